@@ -5,11 +5,38 @@ from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
 
 
-app = Flask(__name__)
-app.config.from_object(os.environ.get('FLASK_ENV') or 'config.DevelopementConfig')
+db = SQLAlchemy()
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
 
-db = SQLAlchemy(app)
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
 
-from . import views
+def create_app(config=None):
+    """Создает приложение с конфигурацией config (путь к классу настроек).
+
+    По умолчанию настройки берутся из FLASK_ENV. Модули с view импортируются
+    только здесь, поэтому "import app" дешев, а pre-fork сервер может загрузить
+    код в мастер-процессе: движок базы создается лениво, при первом запросе.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config or os.environ.get('FLASK_ENV') or 'config.DevelopementConfig')
+
+    from . import (
+        api, assets, auth, cache, conditional, database, images, metrics, pdf, sections, server, storage,
+        templating, uploads, views)
+
+    database.init_app(app)
+    db.init_app(app)
+    login_manager.init_app(app)
+    cache.init_app(app)
+    images.init_app(app)
+    uploads.init_app(app)
+    storage.init_app(app)
+    conditional.init_app(app)
+
+    for blueprint in (auth.bp, views.bp, sections.bp, pdf.bp, api.bp, assets.bp, metrics.bp, server.bp):
+        app.register_blueprint(blueprint)
+
+    # Последним: прогрев шаблонов должен видеть окружение Jinja, настроенное блюпринтами
+    templating.init_app(app)
+
+    return app
@@ -0,0 +1,122 @@
+from flask import Blueprint, Response, jsonify, request
+from flask_login import current_user, login_required
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.database import retry_on_busy
+from app.documents import check_unique_contacts, validate_document, write_document, resume_to_document
+from app.models import Resume
+from app.queries import load_resume_graph
+from app.search import search_resumes
+from app.snapshots import get_snapshot
+
+
+bp = Blueprint('api', __name__)
+
+
+def _owned_resume_id(resume_id):
+    return db.session.query(Resume.id).filter_by(id=resume_id, user_id=current_user.get_id()).scalar()
+
+
+CONTACT_CONFLICT = 'UNIQUE constraint failed: contacts.'
+
+
+def _conflict(error):
+    """Те же контакты записал параллельный запрос уже после проверки: 400 с именем поля.
+
+    Остальные нарушения ограничений - ошибка сервера, а не данных клиента.
+    """
+    message = str(error.orig)
+    if not message.startswith(CONTACT_CONFLICT):
+        raise error
+
+    db.session.rollback()
+    return jsonify({'errors': {'contact': {message[len(CONTACT_CONFLICT):]: ['Уже указано в другом резюме']}}}), 400
+
+
+def _document_response(resume_id, status=200):
+    """Отдает готовый снимок документа одной выборкой; пока снимка нет - собирает документ из таблиц."""
+    snapshot = get_snapshot(resume_id, current_user.get_id())
+
+    if snapshot is not None:
+        return Response(snapshot, status=status, mimetype='application/json')
+
+    if not _owned_resume_id(resume_id):
+        return jsonify({'errors': {'id': ['Резюме не найдено']}}), 404
+
+    return jsonify(resume_to_document(load_resume_graph(resume_id))), status
+
+
+@bp.route('/api/resumes/', methods=['POST'])
+@login_required
+@retry_on_busy
+def api_create_resumes():
+    """Создает резюме из документа или списка документов одной транзакцией."""
+    payload = request.get_json(silent=True)
+    documents = payload if isinstance(payload, list) else [payload]
+    validated, errors = [], {}
+
+    if not documents:
+        return jsonify({'errors': {'documents': ['Пустой список документов']}}), 400
+
+    for index, document in enumerate(documents):
+        data, document_errors = validate_document(document)
+        if document_errors:
+            errors[index] = document_errors
+        validated.append(data)
+
+    for index, document_errors in check_unique_contacts(validated).items():
+        errors.setdefault(index, {}).update(document_errors)
+
+    if errors:
+        return jsonify({'errors': errors if isinstance(payload, list) else errors[0]}), 400
+
+    try:
+        resume_ids = [write_document(int(current_user.get_id()), data) for data in validated]
+        db.session.commit()
+    except IntegrityError as error:
+        return _conflict(error)
+
+    if isinstance(payload, list):
+        return jsonify({'ids': resume_ids}), 201
+
+    return _document_response(resume_ids[0], 201)
+
+
+@bp.route('/api/search/')
+@login_required
+def api_search():
+    """Поиск по резюме текущего пользователя: по навыкам, опыту, образованию и местоположению с ранжированием по BM25."""
+    query = request.args.get('q', '')
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+
+    return jsonify({
+        'query': query,
+        'page': page,
+        'results': search_resumes(query, current_user.get_id(), page, per_page),
+    })
+
+
+@bp.route('/api/resumes/<int:resume_id>/', methods=['GET', 'PUT'])
+@login_required
+@retry_on_busy
+def api_resume(resume_id):
+    if request.method == 'PUT':
+        if not _owned_resume_id(resume_id):
+            return jsonify({'errors': {'id': ['Резюме не найдено']}}), 404
+
+        data, errors = validate_document(request.get_json(silent=True))
+        if not errors:
+            errors = check_unique_contacts([data], resume_id).get(0)
+
+        if errors:
+            return jsonify({'errors': errors}), 400
+
+        try:
+            write_document(int(current_user.get_id()), data, resume_id=resume_id)
+            db.session.commit()
+        except IntegrityError as error:
+            return _conflict(error)
+
+    return _document_response(resume_id)
@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import Blueprint, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # без brotli собираются только .gz-версии
+    brotli = None
+
+
+# Наборы файлов для каждого макета; порядок важен для каскада стилей
+BUNDLES = {
+    'base.css': ['styles/base.css', 'styles/main.css', 'styles/form.css', 'styles/style.css'],
+    'base.js': ['scripts/script.js'],
+    'admin.css': ['styles/main.css', 'styles/base_admin.css', 'styles/form.css'],
+    'login.css': ['styles/login.css', 'styles/form.css'],
+}
+
+STATIC_FOLDER = os.path.join(os.path.dirname(__file__), 'static')
+DIST_FOLDER = os.path.join(STATIC_FOLDER, 'dist')
+MANIFEST_PATH = os.path.join(DIST_FOLDER, 'manifest.json')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+_manifest = None
+
+bp = Blueprint('assets', __name__)
+
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{}:;,>])\s*', r'\1', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    # Без разбора JS безопасно убрать можно только отступы и пустые строки
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def build_assets():
+    """Собирает, минифицирует и сжимает наборы статики. Возвращает новый манифест."""
+    os.makedirs(DIST_FOLDER, exist_ok=True)
+    manifest = {}
+
+    for bundle, sources in BUNDLES.items():
+        stem, extension = bundle.rsplit('.', 1)
+        minify = minify_css if extension == 'css' else minify_js
+        parts = []
+
+        for source in sources:
+            with open(os.path.join(STATIC_FOLDER, source), encoding='utf-8') as file:
+                parts.append(minify(file.read()))
+
+        content = '\n'.join(parts).encode('utf-8')
+        filename = f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}.{extension}'
+        path = os.path.join(DIST_FOLDER, filename)
+
+        with open(path, 'wb') as file:
+            file.write(content)
+        with open(path + '.gz', 'wb') as file:
+            file.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as file:
+                file.write(brotli.compress(content, quality=11))
+
+        manifest[bundle] = filename
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+
+    global _manifest
+    _manifest = manifest
+
+    return manifest
+
+
+def _load_manifest():
+    global _manifest
+
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH, encoding='utf-8') as file:
+                _manifest = json.load(file)
+        except FileNotFoundError:
+            _manifest = {}
+
+    return _manifest
+
+
+@bp.app_template_global()
+def asset_urls(bundle):
+    """Ссылки на собранный набор, а если сборка не выполнялась - на исходные файлы."""
+    filename = _load_manifest().get(bundle)
+
+    if filename:
+        return [url_for('assets.assets', filename=filename)]
+
+    return [url_for('static', filename=source) for source in BUNDLES[bundle]]
+
+
+@bp.route('/assets/<path:filename>')
+def assets(filename):
+    served = filename
+    encoding = None
+
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if request.accept_encodings[candidate] and os.path.exists(os.path.join(DIST_FOLDER, filename + suffix)):
+            served, encoding = filename + suffix, candidate
+            break
+
+    response = send_from_directory(
+        DIST_FOLDER, served, mimetype=mimetypes.guess_type(filename)[0], cache_timeout=IMMUTABLE_MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+
+    if encoding:
+        response.content_encoding = encoding
+
+    return response
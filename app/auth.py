@@ -0,0 +1,74 @@
+from urllib.parse import urlsplit
+
+from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask_login import current_user, login_user, logout_user
+from sqlalchemy.orm import make_transient_to_detached
+
+from app import db, login_manager
+from app.cache import get_user_cache
+from app.database import retry_on_busy
+from app.models import User
+from .forms import LoginForm
+
+
+bp = Blueprint('auth', __name__)
+
+
+@login_manager.user_loader
+def load_user(id):
+    user_cache = get_user_cache()
+    data = user_cache.get(id) if user_cache else None
+
+    if data is None:
+        user = db.session.get(User, int(id))
+
+        if user and user_cache:
+            user_cache.set(id, {'id': user.id, 'username': user.username})
+
+        return user
+
+    # Объект собирается из кэша и присоединяется к сессии без запроса к базе;
+    # остальные поля догрузятся при первом обращении к ним
+    user = User(**data)
+    make_transient_to_detached(user)
+
+    return db.session.merge(user, load=False)
+
+
+@bp.route('/login/', methods=['GET', 'POST'])
+@retry_on_busy
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('resumes.index'))
+
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = db.session.query(User).filter_by(username=form.username.data).first()
+
+        if user:
+            if user.password == form.password.data:
+                login_user(user, remember=form.username)
+                # Перенаправление на страницу "next"
+                next_page = request.args.get('next')
+                if not next_page or urlsplit(next_page).netloc != '':
+                    next_page = url_for('resumes.index')
+
+                return redirect(next_page)
+            else:
+                flash('Неверный пароль. Попробуйте снова.', 'alert-danger')
+        else:
+            user = User(username=form.username.data, password=form.password.data)
+            db.session.add(user)
+            db.session.commit()
+
+            login_user(user, remember=form.username)
+
+            return redirect(url_for('resumes.index'))
+
+    return render_template('login.html', form=form)
+
+
+@bp.route('/logout/')
+def logout():
+    logout_user()
+    return redirect(url_for('auth.login'))
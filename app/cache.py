@@ -0,0 +1,206 @@
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock, local
+
+from flask import current_app, has_app_context, render_template
+from markupsafe import Markup
+from sqlalchemy import event
+
+from app.models import User
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кэш с ограничением размера и счетчиками попаданий."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class MemoryTTLCache:
+    """Кэш с временем жизни записей в памяти процесса поверх LRUCache."""
+
+    def __init__(self, maxsize, ttl):
+        self.ttl = ttl
+        self._cache = LRUCache(maxsize)
+
+    def get(self, key):
+        entry = self._cache.get(key)
+
+        if entry is None:
+            return None
+
+        expires, value = entry
+        if expires < time.monotonic():
+            self._cache.delete(key)
+            return None
+
+        return value
+
+    def set(self, key, value):
+        self._cache.set(key, (time.monotonic() + self.ttl, value))
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class SQLiteTTLCache:
+    """Кэш в локальном файле SQLite, общий для всех воркеров на одной машине.
+
+    Значения хранятся в JSON, поэтому класть в него можно только простые данные.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._local = local()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)')
+            self._local.connection = connection
+
+        return connection
+
+    def get(self, key):
+        row = self._connection.execute(
+            'SELECT value FROM cache WHERE key = ? AND expires >= ?', (key, time.time())).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        self._connection.execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, json.dumps(value), time.time() + self.ttl),
+        )
+
+    def delete(self, key):
+        self._connection.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def make_ttl_cache(backend, maxsize, ttl, path=None):
+    """Создает кэш по имени бэкенда из конфигурации: 'memory', 'sqlite' или 'none' (без кэша)."""
+    if backend in (None, 'none'):
+        return None
+    if backend == 'memory':
+        return MemoryTTLCache(maxsize, ttl)
+    if backend == 'sqlite':
+        return SQLiteTTLCache(path, ttl)
+
+    raise ValueError(f'Неизвестный бэкенд кэша: {backend}')
+
+
+def init_app(app):
+    app.extensions['fragment_cache'] = LRUCache(app.config['FRAGMENT_CACHE_SIZE'])
+    app.extensions['user_cache'] = make_ttl_cache(
+        app.config['USER_CACHE_BACKEND'],
+        app.config['USER_CACHE_SIZE'],
+        app.config['USER_CACHE_TTL'],
+        app.config['USER_CACHE_PATH'],
+    )
+
+
+def get_fragment_cache():
+    return current_app.extensions['fragment_cache']
+
+
+def get_user_cache():
+    return current_app.extensions['user_cache']
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_user(mapper, connection, target):
+    user_cache = get_user_cache() if has_app_context() else None
+    if user_cache:
+        user_cache.delete(str(target.id))
+
+
+def render_fragment(section, row_id, version, template, **context):
+    """Возвращает HTML раздела резюме из кэша или рендерит и кэширует его.
+
+    Ключ кэша - раздел и id строки, а версия (updated_on) хранится рядом
+    с HTML: если строка изменилась, устаревший фрагмент просто перерисовывается.
+    """
+    if row_id is None:
+        return Markup(render_template(template, **context))
+
+    key = (section, row_id)
+    fragment_cache = get_fragment_cache()
+    cached = fragment_cache.get(key)
+
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    html = Markup(render_template(template, **context))
+    fragment_cache.set(key, (version, html))
+
+    return html
+
+
+def invalidate_fragment(section, row_id):
+    get_fragment_cache().delete((section, row_id))
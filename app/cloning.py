@@ -0,0 +1,82 @@
+"""Копирование резюме внутри базы.
+
+Каждая таблица копируется одним INSERT ... SELECT, поэтому число запросов
+не зависит от количества мест работы и учебы, а ORM-объекты не загружаются.
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, literal, null, select, update
+
+from app import db
+from app.models import Resume, Personal, Specialization, Experience, Job, Education, School, Contact, Upload
+from app.tracking import mark_resume_changed
+
+
+COPY_SUFFIX = ' (копия)'
+
+
+def _copy_rows(model, parent_column, old_parent_id, new_parent_id, now):
+    """Копирует строки model, ссылающиеся на old_parent_id, в new_parent_id. Возвращает id последней новой строки.
+
+    Уникальные колонки (контакты) копировать нельзя, поэтому в копии они пустые.
+    """
+    table = model.__table__
+    columns = [
+        column for column in table.columns
+        if column.name not in ('id', parent_column, 'created_on', 'updated_on')
+    ]
+    values = [null() if column.unique else column for column in columns]
+
+    query = (
+        select(*values, literal(new_parent_id), literal(now, DateTime()), literal(now, DateTime()))
+        .where(table.c[parent_column] == old_parent_id)
+        .order_by(table.c.id)
+    )
+    result = db.session.execute(table.insert().from_select(
+        [column.name for column in columns] + [parent_column, 'created_on', 'updated_on'], query))
+
+    return result.lastrowid if result.rowcount else None
+
+
+def clone_resume(resume_id, user_id):
+    """Создает копию резюме пользователя со всеми разделами в текущей транзакции.
+
+    Возвращает id новой резюме или None, если у пользователя нет резюме resume_id.
+    """
+    now = datetime.now()
+    resumes = Resume.__table__
+    result = db.session.execute(resumes.insert().from_select(
+        ['name', 'user_id', 'created_on', 'updated_on'],
+        select(
+            resumes.c.name + COPY_SUFFIX,
+            resumes.c.user_id,
+            literal(now, DateTime()),
+            literal(now, DateTime()),
+        ).where(resumes.c.id == resume_id, resumes.c.user_id == user_id),
+    ))
+
+    if not result.rowcount:
+        return None
+
+    new_id = result.lastrowid
+
+    for model in (Personal, Specialization, Contact):
+        _copy_rows(model, 'resume_id', resume_id, new_id, now)
+
+    for parent, child, column in ((Experience, Job, 'experience_id'), (Education, School, 'education_id')):
+        # У резюме не больше одного раздела, поэтому id новой строки - это lastrowid
+        new_parent_id = _copy_rows(parent, 'resume_id', resume_id, new_id, now)
+        if new_parent_id:
+            old_parent_id = select(parent.id).where(parent.resume_id == resume_id).scalar_subquery()
+            _copy_rows(child, column, old_parent_id, new_parent_id, now)
+
+    # Копия ссылается на тот же файл фотографии
+    uploads = Upload.__table__
+    db.session.execute(
+        update(uploads)
+        .where(uploads.c.path == select(Personal.image).where(Personal.resume_id == new_id).scalar_subquery())
+        .values(refcount=uploads.c.refcount + 1)
+    )
+    mark_resume_changed(new_id)
+
+    return new_id
@@ -0,0 +1,89 @@
+"""Удаление дублирующихся и осиротевших разделов резюме.
+
+До появления уникального ограничения на resume_id create_* записывали новую строку
+раздела при каждом открытии страницы, поэтому у одного резюме могло оказаться
+несколько строк опыта, образования или контактов, а строки удаленных резюме оставались в базе.
+"""
+import json
+
+from sqlalchemy import text
+
+from app.tracking import notify_resume_change
+
+
+# Для опыта и образования сохраняется самая старая строка: на ее id ссылаются места работы и учебы,
+# а дочерние строки дублей переносятся к ней. Для остальных разделов - последняя измененная.
+SECTIONS = {
+    'personal': ('updated_on DESC, id DESC', None),
+    'specializations': ('updated_on DESC, id DESC', None),
+    'experiences': ('id', ('jobs', 'experience_id')),
+    'educations': ('id', ('schools', 'education_id')),
+    'contacts': ('updated_on DESC, id DESC', None),
+}
+
+
+def _release_images(connection, table, ids):
+    if table != 'personal' or not ids:
+        return
+
+    images = connection.execute(
+        text('SELECT image FROM personal WHERE image IS NOT NULL AND id IN (SELECT value FROM json_each(:ids))'),
+        {'ids': json.dumps(ids)},
+    ).scalars().all()
+
+    for image in images:
+        connection.execute(
+            text('UPDATE uploads SET refcount = refcount - 1 WHERE path = :path AND refcount > 0'), {'path': image})
+
+
+def _delete(connection, table, ids):
+    _release_images(connection, table, ids)
+    connection.execute(text(f'DELETE FROM {table} WHERE id IN (SELECT value FROM json_each(:ids))'), {'ids': json.dumps(ids)})
+
+
+def compact(connection, notify=True):
+    """Оставляет не больше одной строки каждого раздела на резюме и удаляет строки без резюме.
+
+    С notify=False обработчики изменений резюме не вызываются: миграция выполняется на схеме,
+    в которой еще нет колонок и таблиц, нужных обработчикам. Возвращает словарь {таблица: число удаленных строк}.
+    """
+    stats = {}
+    changed = set()
+
+    for table, (order, children) in SECTIONS.items():
+        orphans = connection.execute(text(
+            f'SELECT id FROM {table} WHERE resume_id IS NULL OR resume_id NOT IN (SELECT id FROM resumes)'
+        )).scalars().all()
+
+        rows = connection.execute(text(
+            f'SELECT id, resume_id, first_value(id) OVER (PARTITION BY resume_id ORDER BY {order}) AS keep_id '
+            f'FROM {table} WHERE resume_id IN (SELECT id FROM resumes)'
+        )).all()
+        duplicates = [(row.id, row.keep_id) for row in rows if row.id != row.keep_id]
+        changed.update(row.resume_id for row in rows if row.id != row.keep_id)
+
+        if children and duplicates:
+            child_table, column = children
+            connection.execute(
+                text(f'UPDATE {child_table} SET {column} = :keep_id WHERE {column} = :id'),
+                [{'id': id, 'keep_id': keep_id} for id, keep_id in duplicates],
+            )
+
+        _delete(connection, table, orphans + [id for id, _ in duplicates])
+        stats[table] = len(orphans) + len(duplicates)
+
+    for parent_table, (_, children) in SECTIONS.items():
+        if not children:
+            continue
+
+        table, column = children
+        orphans = connection.execute(text(
+            f'SELECT id FROM {table} WHERE {column} IS NULL OR {column} NOT IN (SELECT id FROM {parent_table})'
+        )).scalars().all()
+        _delete(connection, table, orphans)
+        stats[table] = len(orphans)
+
+    if notify:
+        notify_resume_change(connection, changed)
+
+    return stats
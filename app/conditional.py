@@ -0,0 +1,102 @@
+"""Условные GET-запросы к страницам резюме.
+
+Resume.version увеличивается при любом изменении резюме или его разделов
+(см. app.tracking), поэтому ETag страницы можно вычислить одним запросом
+по первичному ключу и ответить 304, не загружая граф резюме и не рендеря шаблон.
+"""
+import hashlib
+import os
+import time
+from datetime import timezone
+from functools import wraps
+
+from flask import current_app, request, session
+from flask_login import current_user
+
+from app import db
+from app.assets import MANIFEST_PATH
+from app.models import Resume
+
+
+def _release(app):
+    # Шаблоны и собранные ассеты меняются только при выкладке: отпечаток считается один раз при старте
+    paths = [MANIFEST_PATH]
+    folder = os.path.join(app.root_path, app.template_folder)
+
+    for root, _, files in os.walk(folder):
+        paths.extend(os.path.join(root, name) for name in files)
+
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        try:
+            digest.update(f'{path}:{os.stat(path).st_mtime_ns}'.encode())
+        except FileNotFoundError:
+            pass
+
+    return digest.hexdigest()
+
+
+def init_app(app):
+    app.extensions['page_release'] = _release(app)
+
+
+def resume_etag(version):
+    """ETag страницы резюме для текущего запроса.
+
+    Кроме версии резюме учитывает endpoint и его аргументы, пользователя, выкладку
+    и CSRF-токен формы: токен в странице из кэша браузера должен оставаться действительным,
+    поэтому ETag меняется каждые пол-WTF_CSRF_TIME_LIMIT.
+    """
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    period = int(time.time() // (time_limit / 2)) if time_limit else 0
+    key = ':'.join(map(str, (
+        current_app.extensions['page_release'],
+        request.endpoint,
+        sorted(request.view_args.items()),
+        version,
+        current_user.get_id(),
+        session.get('csrf_token'),
+        period,
+    )))
+
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _set_validators(response, etag, updated_on):
+    response.set_etag(etag)
+    if updated_on:
+        # updated_on хранится в локальном времени сервера
+        response.last_modified = updated_on.astimezone(timezone.utc)
+    # Браузер хранит страницу, но каждый раз перепроверяет ее
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+
+
+def conditional_resume(view):
+    """Отвечает 304 на GET страницы резюме, если If-None-Match совпадает с текущим ETag.
+
+    Ответу 200 добавляются ETag и Last-Modified, если view не запретил кэширование
+    через Cache-Control: no-store или ответил не 200.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(*args, **kwargs)
+
+        row = db.session.query(Resume.version, Resume.updated_on).filter(Resume.id == kwargs['resume_id']).first()
+        if not row:
+            return view(*args, **kwargs)
+
+        etag = resume_etag(row.version)
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+            _set_validators(response, etag, row.updated_on)
+            return response
+
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.cache_control.no_store:
+            _set_validators(response, etag, row.updated_on)
+
+        return response
+
+    return wrapper
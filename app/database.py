@@ -0,0 +1,123 @@
+import os
+import random
+import sqlite3
+import time
+import weakref
+from functools import wraps
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+from app import db
+
+
+# Профили движка SQLite: PRAGMA на каждом новом соединении и параметры пула.
+# Профиль выбирается настройкой SQLITE_PROFILE.
+SQLITE_PROFILES = {
+    'default': {
+        'pragmas': {},
+        'engine_options': {},
+    },
+    'production': {
+        'pragmas': {
+            # Читатели не блокируют писателя и наоборот; журнал сохраняется в файле базы
+            'journal_mode': 'WAL',
+            # В режиме WAL fsync только на контрольных точках: коммит не теряет целостность
+            'synchronous': 'NORMAL',
+            # Ждать освобождения блокировки вместо немедленной ошибки "database is locked"
+            'busy_timeout': 5000,
+            # 64 МБ кэша страниц (отрицательное значение - в килобайтах)
+            'cache_size': -64000,
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+        'engine_options': {
+            # Переиспользование соединений сохраняет прогретый кэш страниц и mmap;
+            # Flask-SQLAlchemy для файлов SQLite по умолчанию ставит NullPool
+            'poolclass': QueuePool,
+            'pool_size': 5,
+            'max_overflow': 10,
+            'connect_args': {'check_same_thread': False, 'timeout': 5},
+        },
+    },
+}
+
+BUSY_ERRORS = ('database is locked', 'database is busy')
+
+
+_apps = weakref.WeakSet()
+
+
+def init_app(app):
+    """Дополняет параметры движка профилем SQLite. Вызывается до db.init_app."""
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+
+    if uri.startswith('sqlite') and uri not in ('sqlite://', 'sqlite:///:memory:'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(
+            SQLITE_PROFILES[app.config['SQLITE_PROFILE']]['engine_options'],
+            **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+        )
+
+    _apps.add(app)
+
+
+def _dispose_engines_after_fork():
+    # Движок создается лениво, при первом запросе к базе. Если мастер-процесс
+    # pre-fork сервера уже успел его создать, дочерний процесс не должен
+    # пользоваться унаследованными соединениями: пул сбрасывается без их закрытия,
+    # чтобы не закрыть соединения родителя.
+    for app in _apps:
+        state = app.extensions.get('sqlalchemy')
+        if state is not None:
+            for connector in state.connectors.values():
+                connector.get_engine().dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_dispose_engines_after_fork)
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # Соединения открываются только внутри контекста приложения: без него Flask-SQLAlchemy не отдает движок
+    if not isinstance(dbapi_connection, sqlite3.Connection) or not has_app_context():
+        return
+
+    cursor = dbapi_connection.cursor()
+    # Без этого SQLite не проверяет внешние ключи и не выполняет ON DELETE CASCADE
+    cursor.execute('PRAGMA foreign_keys=ON')
+    for name, value in SQLITE_PROFILES[current_app.config['SQLITE_PROFILE']]['pragmas'].items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+
+def is_busy_error(error):
+    return isinstance(error, OperationalError) and any(message in str(error.orig) for message in BUSY_ERRORS)
+
+
+def retry_on_busy(view):
+    """Повторяет пишущий view, если SQLite ответил "database is locked".
+
+    pysqlite не открывает транзакцию на SELECT, поэтому блокировку записи view запрашивает
+    при первом INSERT, UPDATE или DELETE. Если другое соединение держит ее дольше
+    busy_timeout - например, долгий импорт или пачка записей под нагрузкой, - запрос
+    завершается ошибкой. Транзакцию остается только откатить и выполнить view заново
+    целиком с экспоненциальной задержкой.
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        attempts = current_app.config['SQLITE_BUSY_RETRIES']
+
+        for attempt in range(attempts + 1):
+            try:
+                return view(*args, **kwargs)
+            except OperationalError as error:
+                if attempt == attempts or not is_busy_error(error):
+                    raise
+                db.session.rollback()
+                time.sleep(current_app.config['SQLITE_BUSY_BACKOFF'] * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    return wrapper
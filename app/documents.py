@@ -0,0 +1,281 @@
+"""Резюме как единый JSON-документ: проверка теми же формами, что и в интерфейсе, и запись одной транзакцией."""
+from datetime import date, datetime
+
+from sqlalchemy import delete, insert, select, update
+from werkzeug.datastructures import MultiDict
+from wtforms.fields.core import UnboundField
+
+from app import db
+from app.forms import PersonalForm, SpecializationForm, JobForm, SchoolForm, ContactForm, ResumeForm
+from app.models import Resume, Personal, Specialization, Experience, Job, Education, School, Contact
+from app.storage import release_uploads
+from app.tracking import mark_resume_changed
+
+
+SINGLE_SECTIONS = {
+    'personal': (PersonalForm, Personal),
+    'specialization': (SpecializationForm, Specialization),
+    'contact': (ContactForm, Contact),
+}
+
+LIST_SECTIONS = {
+    'jobs': (JobForm, Job),
+    'schools': (SchoolForm, School),
+}
+
+# Поля, которые не задаются через документ: файл фотографии загружается отдельно
+READ_ONLY_FIELDS = {'image'}
+
+
+def form_fields(form_class):
+    return [
+        name for name in dir(form_class)
+        if isinstance(getattr(form_class, name), UnboundField) and name != 'submit' and name not in READ_ONLY_FIELDS
+    ]
+
+
+def _formdata(section):
+    formdata = MultiDict()
+
+    for key, value in section.items():
+        if value is None:
+            continue
+        # Формы разбирают данные как строки из POST-запроса; логические значения они понимают сами
+        formdata[key] = value if isinstance(value, bool) else str(value)
+
+    return formdata
+
+
+def _validate_section(form_class, section):
+    if not isinstance(section, dict):
+        return None, ['Ожидается объект']
+
+    form = form_class(formdata=_formdata(section), meta={'csrf': False})
+
+    if not form.validate():
+        return None, form.errors
+
+    return {name: form[name].data for name in form_fields(form_class)}, None
+
+
+def validate_document(document):
+    """Проверяет документ резюме. Возвращает (данные для записи, None) или (None, ошибки)."""
+    if not isinstance(document, dict):
+        return None, {'document': ['Ожидается объект']}
+
+    data, errors = {}, {}
+
+    resume, resume_errors = _validate_section(ResumeForm, {'name': document.get('name')})
+    if resume_errors:
+        errors['name'] = resume_errors['name']
+    else:
+        data['name'] = resume['name']
+
+    for key, (form_class, _) in SINGLE_SECTIONS.items():
+        if document.get(key) is None:
+            data[key] = None
+            continue
+
+        data[key], section_errors = _validate_section(form_class, document[key])
+        if section_errors:
+            errors[key] = section_errors
+
+    for key, (form_class, _) in LIST_SECTIONS.items():
+        items = document.get(key) or []
+
+        if not isinstance(items, list):
+            errors[key] = ['Ожидается список']
+            continue
+
+        data[key] = []
+        for index, item in enumerate(items):
+            item_data, item_errors = _validate_section(form_class, item)
+            if item_errors:
+                errors.setdefault(key, {})[index] = item_errors
+            else:
+                data[key].append(item_data)
+
+    return (None, errors) if errors else (data, None)
+
+
+def _unique_contact_fields():
+    return [name for name in form_fields(ContactForm) if Contact.__table__.c[name].unique]
+
+
+def check_unique_contacts(documents, resume_id=None):
+    """Проверяет уникальные поля контактов внутри пачки проверенных документов и по базе.
+
+    Контакты резюме resume_id, которое заменяется документом, не считаются занятыми.
+    Возвращает {индекс документа: {'contact': {поле: [ошибка]}}}.
+    """
+    errors, seen = {}, {}
+
+    def fail(index, name, message):
+        errors.setdefault(index, {}).setdefault('contact', {})[name] = [message]
+
+    for index, data in enumerate(documents):
+        contact = data and data['contact']
+        for name in _unique_contact_fields() if contact else ():
+            if contact[name] is None:
+                continue
+            if (name, contact[name]) in seen:
+                fail(index, name, f'Совпадает с документом {seen[name, contact[name]]}')
+            else:
+                seen[name, contact[name]] = index
+
+    for name in _unique_contact_fields():
+        values = [value for field, value in seen if field == name]
+        if not values:
+            continue
+
+        column = Contact.__table__.c[name]
+        query = select(column).where(column.in_(values))
+        if resume_id is not None:
+            query = query.where(Contact.resume_id != resume_id)
+
+        for value in db.session.execute(query).scalars():
+            fail(seen[name, value], name, 'Уже указано в другом резюме')
+
+    return errors
+
+
+def _clear_sections(resume_id):
+    experiences = select(Experience.id).where(Experience.resume_id == resume_id)
+    educations = select(Education.id).where(Education.resume_id == resume_id)
+
+    db.session.execute(delete(Job.__table__).where(Job.experience_id.in_(experiences)))
+    db.session.execute(delete(School.__table__).where(School.education_id.in_(educations)))
+
+    for model in (Personal, Specialization, Contact, Experience, Education):
+        db.session.execute(delete(model.__table__).where(model.resume_id == resume_id))
+
+
+def write_document(user_id, data, resume_id=None):
+    """Записывает проверенный документ пакетными INSERT в текущей транзакции.
+
+    Если resume_id задан, разделы резюме заменяются целиком, фотография сохраняется.
+    Фиксация транзакции остается за вызывающим кодом. Возвращает id резюме.
+    """
+    image = None
+
+    if resume_id is None:
+        resume_id = db.session.execute(
+            insert(Resume.__table__).values(name=data['name'], user_id=user_id)).inserted_primary_key[0]
+    else:
+        image = db.session.execute(select(Personal.image).where(Personal.resume_id == resume_id)).scalar()
+        if image and data['personal'] is None:
+            # Личные данные удаляются вместе с фотографией: ссылка на файл больше не нужна
+            release_uploads([image])
+            image = None
+        db.session.execute(update(Resume.__table__).where(Resume.id == resume_id).values(name=data['name']))
+        _clear_sections(resume_id)
+
+    for key, (_, model) in SINGLE_SECTIONS.items():
+        if data[key] is not None:
+            values = dict(data[key], resume_id=resume_id)
+            if model is Personal:
+                values['image'] = image
+            db.session.execute(insert(model.__table__).values(**values))
+
+    for key, parent, column in (('jobs', Experience, 'experience_id'), ('schools', Education, 'education_id')):
+        parent_id = db.session.execute(insert(parent.__table__).values(resume_id=resume_id)).inserted_primary_key[0]
+        _, model = LIST_SECTIONS[key]
+
+        if data[key]:
+            db.session.execute(insert(model.__table__), [dict(item, **{column: parent_id}) for item in data[key]])
+
+    mark_resume_changed(resume_id)
+
+    return resume_id
+
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _section_dict(row, fields):
+    return {name: _jsonable(row[name]) for name in fields}
+
+
+def _fetch_by_resume(connection, model, resume_ids, fields):
+    query = select(*[model.__table__.c[name] for name in fields], model.resume_id).where(
+        model.resume_id.in_(resume_ids))
+    return connection.execute(query).mappings()
+
+
+def _fetch_children(connection, parent, model, column, resume_ids, fields):
+    query = (
+        select(*[model.__table__.c[name] for name in fields], parent.resume_id)
+        .join(parent, parent.id == getattr(model, column))
+        .where(parent.resume_id.in_(resume_ids))
+        .order_by(model.id)
+    )
+    return connection.execute(query).mappings()
+
+
+def _table_fields(model):
+    return [column.name for column in model.__table__.columns if column.name != 'id' and not column.foreign_keys]
+
+
+def load_documents(connection, resume_ids, all_columns=False):
+    """Собирает документы резюме по одному запросу на таблицу, без ORM. Возвращает {id: документ}.
+
+    Документ тот же, что у resume_to_document; резюме, которых нет в базе, пропускаются.
+    С all_columns в разделы попадают все колонки таблиц, кроме ключей, в том числе
+    не редактируемые через формы: так экспорт сохраняет резюме без потерь.
+    """
+    rows = connection.execute(
+        select(Resume.id, Resume.name).where(Resume.id.in_(resume_ids)).order_by(Resume.id)).all()
+    documents = {
+        row.id: {'id': row.id, 'name': row.name, 'personal': None, 'specialization': None, 'contact': None,
+                 'jobs': [], 'schools': []}
+        for row in rows
+    }
+    if not documents:
+        return documents
+
+    ids = list(documents)
+    for key, (form_class, model) in SINGLE_SECTIONS.items():
+        if all_columns:
+            fields = _table_fields(model)
+        else:
+            fields = form_fields(form_class) + (['image'] if model is Personal else [])
+        for row in _fetch_by_resume(connection, model, ids, fields):
+            documents[row['resume_id']][key] = _section_dict(row, fields)
+
+    for key, parent, column in (('jobs', Experience, 'experience_id'), ('schools', Education, 'education_id')):
+        form_class, model = LIST_SECTIONS[key]
+        fields = _table_fields(model) if all_columns else form_fields(form_class)
+        for row in _fetch_children(connection, parent, model, column, ids, fields):
+            documents[row['resume_id']][key].append(_section_dict(row, fields))
+
+    return documents
+
+
+def _row_to_dict(row, fields):
+    result = {}
+
+    for name in fields:
+        value = getattr(row, name)
+        result[name] = value.isoformat() if hasattr(value, 'isoformat') else value
+
+    return result
+
+
+def resume_to_document(resume):
+    """Собирает документ из резюме, загруженного через load_resume_graph."""
+    document = {'id': resume.id, 'name': resume.name}
+
+    for key, (form_class, _) in SINGLE_SECTIONS.items():
+        row = getattr(resume, key)
+        document[key] = _row_to_dict(row, form_fields(form_class)) if row else None
+
+    if document['personal'] is not None:
+        document['personal']['image'] = resume.personal.image
+
+    jobs = resume.experience.jobs if resume.experience else []
+    schools = resume.education.schools if resume.education else []
+    document['jobs'] = [_row_to_dict(job, form_fields(JobForm)) for job in jobs]
+    document['schools'] = [_row_to_dict(school, form_fields(SchoolForm)) for school in schools]
+
+    return document
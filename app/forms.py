@@ -3,23 +3,30 @@ from flask_wtf.file import FileField, FileAllowed
 from wtforms import (
     StringField, DateField, SubmitField, TextAreaField, IntegerField, BooleanField, PasswordField)
 from wtforms.fields.choices import SelectField
+from wtforms.fields.core import UnboundField
 from wtforms.validators import DataRequired, Email, InputRequired, NumberRange
 
 
 class BaseForm:
     submit = SubmitField('Сохранить', render_kw={'class': 'submit-button'})
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        for field in self:
-            if field.name in ('submit', 'csrf_token'):
+    def __init_subclass__(cls, **kwargs):
+        # Класс form-field добавляется один раз, при объявлении формы: render_kw общий для всех
+        # экземпляров поля, поэтому изменять его в __init__ нельзя - строка росла бы с каждым запросом
+        super().__init_subclass__(**kwargs)
+
+        for name, unbound in list(vars(cls).items()):
+            if not isinstance(unbound, UnboundField) or name in ('submit', 'csrf_token'):
                 continue
 
-            if hasattr(field, 'render_kw') and field.render_kw:
-                existing_classes = field.render_kw.get('class', '')
-                field.render_kw['class'] = (existing_classes + ' form-field').strip()
-            else:
-                field.render_kw = {'class': 'form-field'}
+            render_kw = dict(unbound.kwargs.get('render_kw') or {})
+            render_kw['class'] = (render_kw.get('class', '') + ' form-field').strip()
+
+            field = UnboundField(
+                unbound.field_class, *unbound.args, name=unbound.name, **dict(unbound.kwargs, render_kw=render_kw))
+            # Сохраняем порядок полей в форме
+            field.creation_counter = unbound.creation_counter
+            setattr(cls, name, field)
 
 
 class LoginForm(FlaskForm):
@@ -122,7 +129,7 @@ class JobForm(BaseForm, FlaskForm):
         validators=[DataRequired()],
     )
     position = StringField('Ваша должность в компании')
-    start = DateField('Начало работы')
+    start = DateField('Начало работы', validators=[DataRequired()])
     finish = DateField('Окончание работы')
     about = TextAreaField('Ваши обязанности и достижения')
     skills = TextAreaField('Применяемые вами навыки')
@@ -131,8 +138,8 @@ class JobForm(BaseForm, FlaskForm):
 class SchoolForm(BaseForm, FlaskForm):
     name = StringField('Название учебного заведения', validators=[DataRequired()])
     course = StringField('Название пройденного курса', validators=[DataRequired()])
-    start = DateField('Начало учебы')
-    finish = DateField('Завершение учебы')
+    start = DateField('Начало учебы', validators=[DataRequired()])
+    finish = DateField('Завершение учебы', validators=[DataRequired()])
 
 
 class ContactForm(BaseForm, FlaskForm):
@@ -0,0 +1,162 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from flask import current_app, url_for
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow не обязателен, без него отдаются оригиналы
+    Image = None
+
+
+RESIZABLE_FORMATS = {'png': 'PNG', 'jpg': 'JPEG', 'jpeg': 'JPEG'}
+
+_executor = None
+
+
+def variant_path(image, width, extension):
+    """Путь уменьшенной копии изображения относительно UPLOAD_FOLDER."""
+    stem, _ = os.path.splitext(image)
+    return f'{stem}_{width}.{extension}'
+
+
+def _save_atomically(image, path, image_format, **options):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    os.close(fd)
+
+    try:
+        image.save(temp_path, image_format, **options)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def make_variants(folder, image, widths):
+    """Создает уменьшенные копии и WebP-версии изображения. Выполняется в отдельном процессе."""
+    source = os.path.join(folder, *image.split('/'))
+    extension = image.rsplit('.', 1)[1].lower()
+
+    with Image.open(source) as original:
+        original.load()
+
+        for width in widths:
+            if width >= original.width:
+                continue
+
+            resized = original.copy()
+            resized.thumbnail((width, original.height * width // original.width))
+
+            webp_path = os.path.join(folder, *variant_path(image, width, 'webp').split('/'))
+            _save_atomically(resized, webp_path, 'WEBP', quality=80, method=4)
+
+            if extension in RESIZABLE_FORMATS:
+                if RESIZABLE_FORMATS[extension] == 'JPEG' and resized.mode != 'RGB':
+                    resized = resized.convert('RGB')
+                path = os.path.join(folder, *variant_path(image, width, extension).split('/'))
+                _save_atomically(resized, path, RESIZABLE_FORMATS[extension], optimize=True)
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=current_app.config['IMAGE_WORKERS'])
+
+    return _executor
+
+
+def schedule_variants(image):
+    """Ставит генерацию уменьшенных копий в очередь пула процессов, не дожидаясь результата."""
+    if Image is None or not image:
+        return None
+
+    return _get_executor().submit(
+        make_variants, current_app.config['UPLOAD_FOLDER'], image, current_app.config['IMAGE_VARIANT_WIDTHS'])
+
+
+def _srcset(image, extension):
+    folder = current_app.config['UPLOAD_FOLDER']
+    candidates = []
+
+    for width in current_app.config['IMAGE_VARIANT_WIDTHS']:
+        path = variant_path(image, width, extension)
+        if os.path.exists(os.path.join(folder, *path.split('/'))):
+            candidates.append(f"{url_for('static', filename='uploads/' + path)} {width}w")
+
+    return ', '.join(candidates)
+
+
+def image_variants(image):
+    """Возвращает srcset для WebP и исходного формата. Пока копии не готовы, srcset пустые."""
+    extension = image.rsplit('.', 1)[1].lower()
+
+    return {
+        'src': url_for('static', filename='uploads/' + image),
+        'webp': _srcset(image, 'webp'),
+        'srcset': _srcset(image, extension) if extension in RESIZABLE_FORMATS else '',
+    }
+
+
+def variant_files(image, widths=None):
+    """Все возможные пути уменьшенных копий изображения, в том числе еще не созданных."""
+    extension = image.rsplit('.', 1)[1].lower()
+    extensions = ['webp'] + ([extension] if extension in RESIZABLE_FORMATS else [])
+    widths = current_app.config['IMAGE_VARIANT_WIDTHS'] if widths is None else widths
+
+    return [
+        variant_path(image, width, variant_extension)
+        for width in widths
+        for variant_extension in extensions
+    ]
+
+
+def available_variants(image):
+    """Уже созданные копии изображения; меняется по мере работы пула процессов."""
+    if not image:
+        return ()
+
+    folder = current_app.config['UPLOAD_FOLDER']
+    return tuple(path for path in variant_files(image) if os.path.exists(os.path.join(folder, *path.split('/'))))
+
+
+def _expected_widths(source):
+    """Ширины, которые make_variants создаст для изображения: копии не шире оригинала не делаются."""
+    try:
+        # Image.open читает только заголовок файла
+        with Image.open(source) as original:
+            width = original.width
+    except (OSError, ValueError):
+        return ()
+
+    return [value for value in current_app.config['IMAGE_VARIANT_WIDTHS'] if value < width]
+
+
+def variants_ready(image):
+    """True, если все копии изображения уже созданы или создаваться не будут.
+
+    Фото старше IMAGE_VARIANT_TIMEOUT считается готовым с теми копиями, что есть:
+    для старых фото копии не заказывались, а неудачное уменьшение не повторяется.
+    """
+    if Image is None or not image:
+        return True
+
+    folder = current_app.config['UPLOAD_FOLDER']
+    available = available_variants(image)
+    if len(available) == len(variant_files(image)):
+        return True
+
+    source = os.path.join(folder, *image.split('/'))
+    try:
+        if os.path.getmtime(source) < time.time() - current_app.config['IMAGE_VARIANT_TIMEOUT']:
+            return True
+    except OSError:
+        return True
+
+    return set(variant_files(image, _expected_widths(source))) <= set(available)
+
+
+def init_app(app):
+    app.add_template_global(image_variants)
@@ -0,0 +1,230 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Blueprint, Response, current_app, g, request
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+bp = Blueprint('metrics', __name__)
+
+
+# Границы корзин гистограмм в секундах и в штуках запросов
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus с метками endpoint и method."""
+
+    def __init__(self, name, description, buckets):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+
+        with self._lock:
+            for (endpoint, method), (counts, total, value_sum) in sorted(self._series.items()):
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {total}')
+                lines.append(f'{self.name}_sum{{{labels}}} {value_sum}')
+                lines.append(f'{self.name}_count{{{labels}}} {total}')
+
+        return lines
+
+
+request_duration = Histogram(
+    'resume_request_duration_seconds', 'Время обработки запроса', TIME_BUCKETS)
+sql_statements = Histogram(
+    'resume_request_sql_statements', 'Число SQL-запросов за запрос', COUNT_BUCKETS)
+sql_duration = Histogram(
+    'resume_request_sql_duration_seconds', 'Время SQL-запросов за запрос', TIME_BUCKETS)
+template_duration = Histogram(
+    'resume_request_template_duration_seconds', 'Время рендеринга шаблонов за запрос', TIME_BUCKETS)
+
+HISTOGRAMS = (request_duration, sql_statements, sql_duration, template_duration)
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.statements = []
+
+
+def _current_stats():
+    # Вне запроса (команды runner.py, фоновые задачи) статистика не собирается
+    return g.get('_request_stats') if g else None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    connection.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - connection.info['query_started'].pop()
+    stats = _current_stats()
+
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_time += elapsed
+        if len(stats.statements) < current_app.config['SLOW_REQUEST_STATEMENTS']:
+            stats.statements.append((elapsed, statement))
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+class TimedTemplate(Template):
+    """Шаблон, который учитывает время рендеринга в статистике запроса.
+
+    Вложенные рендеры (например, фрагменты разделов внутри страницы) не суммируются повторно.
+    """
+
+    def render(self, *args, **kwargs):
+        stats = _current_stats()
+        if stats is None:
+            return super().render(*args, **kwargs)
+
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - started
+
+
+@bp.record_once
+def use_timed_templates(state):
+    state.app.jinja_env.template_class = TimedTemplate
+
+
+class StackSampler(threading.Thread):
+    """Сэмплирующий профилировщик одного потока.
+
+    Раз в interval секунд снимает стек потока и копит его в свернутом виде
+    (формат flamegraph.pl и speedscope: "модуль:функция;модуль:функция число").
+    """
+
+    def __init__(self, thread_id, interval, stacks):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = stacks
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+_profile_stacks = Counter()
+_profile_lock = threading.Lock()
+
+
+def _write_profile(endpoint, stacks):
+    folder = current_app.config['PROFILE_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+
+    with _profile_lock:
+        _profile_stacks.update(stacks)
+        path = os.path.join(folder, f'{endpoint}.folded')
+        with open(path + '.tmp', 'w', encoding='utf-8') as file:
+            for stack, count in _profile_stacks.items():
+                file.write(f'{stack} {count}\n')
+        os.replace(path + '.tmp', path)
+
+
+@bp.before_app_request
+def start_request_stats():
+    g._request_stats = RequestStats()
+
+    if current_app.config['PROFILE_ENDPOINT'] and request.endpoint == current_app.config['PROFILE_ENDPOINT']:
+        g._sampler = StackSampler(threading.get_ident(), current_app.config['PROFILE_INTERVAL'], Counter())
+        g._sampler.start()
+
+
+@bp.teardown_app_request
+def record_request_stats(exc):
+    stats = g.pop('_request_stats', None)
+    if stats is None:
+        return
+
+    elapsed = time.perf_counter() - stats.started
+    labels = (request.endpoint or 'unknown', request.method)
+    request_duration.observe(labels, elapsed)
+    sql_statements.observe(labels, stats.sql_count)
+    sql_duration.observe(labels, stats.sql_time)
+    template_duration.observe(labels, stats.template_time)
+
+    sampler = g.pop('_sampler', None)
+    if sampler is not None:
+        sampler.stop()
+        _write_profile(request.endpoint, sampler.stacks)
+
+    if elapsed >= current_app.config['SLOW_REQUEST_SECONDS']:
+        statements = '\n'.join(
+            f'  {duration * 1000:.1f} мс: {statement}'
+            for duration, statement in sorted(stats.statements, reverse=True)
+        )
+        current_app.logger.warning(
+            'Медленный запрос %s %s: %.3f с, SQL: %d запросов за %.3f с, шаблоны: %.3f с\n%s',
+            request.method, request.full_path, elapsed, stats.sql_count, stats.sql_time, stats.template_time,
+            statements,
+        )
+
+
+@bp.route('/metrics')
+def metrics():
+    """Метрики текущего процесса в текстовом формате Prometheus."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.expose())
+
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
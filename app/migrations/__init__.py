@@ -0,0 +1,98 @@
+from sqlalchemy import text
+
+from app import db
+from app.migrations.versions import MIGRATIONS
+
+
+VERSION_TABLE = 'schema_version'
+
+# Запросы, которые выполняются на каждой странице; ни один из них не должен читать таблицу целиком
+HOT_QUERIES = {
+    'index': (
+        "SELECT id, name, updated_on FROM resumes WHERE user_id = 1 AND (updated_on, id) < ('2024-01-01', 1) "
+        'ORDER BY updated_on DESC, id DESC LIMIT 51'
+    ),
+    'login': "SELECT id FROM users WHERE username = 'user'",
+    'edit_personal': 'SELECT id FROM personal WHERE resume_id = 1',
+    'edit_specialization': 'SELECT id FROM specializations WHERE resume_id = 1',
+    'edit_experience': 'SELECT id FROM experiences WHERE resume_id = 1',
+    'edit_education': 'SELECT id FROM educations WHERE resume_id = 1',
+    'edit_contact': 'SELECT id FROM contacts WHERE resume_id = 1',
+    'jobs': 'SELECT id, name FROM jobs WHERE experience_id = 1',
+    'schools': 'SELECT id, name FROM schools WHERE education_id = 1',
+}
+
+
+def current_version(connection):
+    connection.exec_driver_sql(f'CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (version INTEGER NOT NULL)')
+    version = connection.exec_driver_sql(f'SELECT max(version) FROM {VERSION_TABLE}').scalar()
+
+    return version or 0
+
+
+def _set_version(connection, version):
+    connection.exec_driver_sql(f'DELETE FROM {VERSION_TABLE}')
+    connection.execute(text(f'INSERT INTO {VERSION_TABLE} (version) VALUES (:version)'), {'version': version})
+
+
+def _run(connection, steps):
+    for step in steps:
+        if callable(step):
+            step(connection)
+        else:
+            connection.exec_driver_sql(step)
+
+
+def upgrade(target=None):
+    """Применяет миграции до версии target (по умолчанию до последней). Каждая - в своей транзакции."""
+    target = MIGRATIONS[-1].version if target is None else target
+    applied = []
+
+    for migration in MIGRATIONS:
+        with db.engine.begin() as connection:
+            if migration.version <= current_version(connection) or migration.version > target:
+                continue
+
+            _run(connection, migration.upgrade)
+            _set_version(connection, migration.version)
+
+        applied.append(migration)
+
+    return applied
+
+
+def downgrade(target):
+    """Откатывает миграции новее версии target в обратном порядке."""
+    reverted = []
+
+    for migration in reversed(MIGRATIONS):
+        with db.engine.begin() as connection:
+            if migration.version > current_version(connection) or migration.version <= target:
+                continue
+
+            _run(connection, migration.downgrade)
+            _set_version(connection, migration.version - 1)
+
+        reverted.append(migration)
+
+    return reverted
+
+
+def get_current_version():
+    with db.engine.begin() as connection:
+        return current_version(connection)
+
+
+def check_query_plans():
+    """Возвращает словарь {запрос: строки плана} для горячих запросов, которые сканируют таблицу целиком."""
+    failures = {}
+
+    with db.engine.connect() as connection:
+        for name, query in HOT_QUERIES.items():
+            plan = [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {query}')]
+            scans = [detail for detail in plan if detail.startswith('SCAN')]
+
+            if scans:
+                failures[name] = scans
+
+    return failures
@@ -0,0 +1,272 @@
+"""Версии схемы базы данных.
+
+Каждый шаг миграции - SQL-строка или функция, принимающая соединение.
+Новые миграции добавляются в конец списка с очередным номером версии.
+"""
+from collections import namedtuple
+
+from app.compaction import compact
+from app.search import rebuild_index
+from app.snapshots import rebuild_snapshots
+
+
+Migration = namedtuple('Migration', ['version', 'description', 'upgrade', 'downgrade'])
+
+
+# Схема в том виде, в каком ее создавал db.create_all(); IF NOT EXISTS позволяет
+# применить миграцию к базам, созданным до появления миграций
+INITIAL_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER NOT NULL,
+        username VARCHAR(80) NOT NULL,
+        password VARCHAR(80) NOT NULL,
+        created_on DATETIME,
+        updated_on DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (username)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS resumes (
+        id INTEGER NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        created_on DATETIME,
+        updated_on DATETIME,
+        user_id INTEGER,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES users (id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS personal (
+        id INTEGER NOT NULL,
+        image VARCHAR(200),
+        surname VARCHAR(50) NOT NULL,
+        name VARCHAR(50) NOT NULL,
+        patronymic VARCHAR(50),
+        gender VARCHAR(10) NOT NULL,
+        birthdate DATE,
+        location VARCHAR(100),
+        citizenship VARCHAR(20),
+        about VARCHAR(100),
+        created_on DATETIME,
+        updated_on DATETIME,
+        resume_id INTEGER,
+        PRIMARY KEY (id),
+        CONSTRAINT check_gender_validity CHECK (gender IN ('male', 'female')),
+        FOREIGN KEY(resume_id) REFERENCES resumes (id) ON DELETE CASCADE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS specializations (
+        id INTEGER NOT NULL,
+        readiness VARCHAR(21),
+        salary INTEGER,
+        slogan VARCHAR(80),
+        specialization VARCHAR(27) NOT NULL,
+        grade VARCHAR(16) NOT NULL,
+        skills VARCHAR(255) NOT NULL,
+        languages VARCHAR(50),
+        remote_ready BOOLEAN,
+        relocation_ready BOOLEAN,
+        created_on DATETIME,
+        updated_on DATETIME,
+        resume_id INTEGER,
+        PRIMARY KEY (id),
+        CONSTRAINT check_readiness_validity CHECK (readiness in ('not_looking', 'looking', 'consider')),
+        CONSTRAINT check_specialization_validity CHECK (specialization in ('development', 'testing', 'analytics', 'design', 'management', 'security', 'ai')),
+        CONSTRAINT check_grade_validity CHECK (grade in ('no', 'intern', 'junior', 'middle', 'senior', 'lead')),
+        FOREIGN KEY(resume_id) REFERENCES resumes (id) ON DELETE CASCADE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS experiences (
+        id INTEGER NOT NULL,
+        created_on DATETIME,
+        updated_on DATETIME,
+        resume_id INTEGER,
+        PRIMARY KEY (id),
+        FOREIGN KEY(resume_id) REFERENCES resumes (id) ON DELETE CASCADE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER NOT NULL,
+        name VARCHAR(30) NOT NULL,
+        location VARCHAR(255),
+        specialization VARCHAR(27) NOT NULL,
+        grade VARCHAR(16) NOT NULL,
+        position VARCHAR(30),
+        start DATE NOT NULL,
+        finish DATE,
+        about VARCHAR(255),
+        skills VARCHAR(255),
+        created_on DATETIME,
+        updated_on DATETIME,
+        experience_id INTEGER,
+        PRIMARY KEY (id),
+        CONSTRAINT check_specialization_validity CHECK (specialization in ('development', 'testing', 'analytics', 'design', 'management', 'security', 'ai')),
+        CONSTRAINT check_grade_validity CHECK (grade in ('no', 'intern', 'junior', 'middle', 'senior', 'lead')),
+        FOREIGN KEY(experience_id) REFERENCES experiences (id) ON DELETE CASCADE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS educations (
+        id INTEGER NOT NULL,
+        created_on DATETIME,
+        updated_on DATETIME,
+        resume_id INTEGER,
+        PRIMARY KEY (id),
+        FOREIGN KEY(resume_id) REFERENCES resumes (id) ON DELETE CASCADE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS schools (
+        id INTEGER NOT NULL,
+        name VARCHAR(30) NOT NULL,
+        course VARCHAR(50) NOT NULL,
+        start DATE NOT NULL,
+        finish DATE NOT NULL,
+        practice VARCHAR(255),
+        created_on DATETIME,
+        updated_on DATETIME,
+        education_id INTEGER,
+        PRIMARY KEY (id),
+        FOREIGN KEY(education_id) REFERENCES educations (id) ON DELETE CASCADE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS contacts (
+        id INTEGER NOT NULL,
+        phone VARCHAR(30),
+        email VARCHAR(120),
+        telegram VARCHAR(30),
+        sn_profile VARCHAR(120),
+        created_on DATETIME,
+        updated_on DATETIME,
+        resume_id INTEGER,
+        PRIMARY KEY (id),
+        UNIQUE (phone),
+        UNIQUE (email),
+        UNIQUE (telegram),
+        UNIQUE (sn_profile),
+        FOREIGN KEY(resume_id) REFERENCES resumes (id) ON DELETE CASCADE
+    )
+    ''',
+]
+
+UPLOADS_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS uploads (
+        id INTEGER NOT NULL,
+        path VARCHAR(200) NOT NULL,
+        size INTEGER NOT NULL,
+        refcount INTEGER NOT NULL,
+        created_on DATETIME,
+        updated_on DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (path)
+    )
+    ''',
+]
+
+FOREIGN_KEY_INDEXES = [
+    ('ix_resumes_user_id', 'resumes', 'user_id'),
+    ('ix_personal_resume_id', 'personal', 'resume_id'),
+    ('ix_specializations_resume_id', 'specializations', 'resume_id'),
+    ('ix_experiences_resume_id', 'experiences', 'resume_id'),
+    ('ix_jobs_experience_id', 'jobs', 'experience_id'),
+    ('ix_educations_resume_id', 'educations', 'resume_id'),
+    ('ix_schools_education_id', 'schools', 'education_id'),
+    ('ix_contacts_resume_id', 'contacts', 'resume_id'),
+]
+
+# Разделы, которых у резюме может быть не больше одного
+SINGLE_SECTION_INDEXES = [
+    ('ix_personal_resume_id', 'personal'),
+    ('ix_specializations_resume_id', 'specializations'),
+    ('ix_experiences_resume_id', 'experiences'),
+    ('ix_educations_resume_id', 'educations'),
+    ('ix_contacts_resume_id', 'contacts'),
+]
+
+
+def compact_sections(connection):
+    # Обработчики изменений резюме рассчитывают на схему последней версии, поэтому индекс поиска
+    # перестраивается отдельным шагом, а версии и снимки задают миграции 7 и 8
+    compact(connection, notify=False)
+
+
+MIGRATIONS = [
+    Migration(
+        1,
+        'Исходная схема',
+        INITIAL_SCHEMA,
+        [
+            f'DROP TABLE {table}'
+            for table in ('contacts', 'schools', 'educations', 'jobs', 'experiences', 'specializations',
+                          'personal', 'resumes', 'users')
+        ],
+    ),
+    Migration(2, 'Таблица загруженных файлов', UPLOADS_SCHEMA, ['DROP TABLE uploads']),
+    Migration(
+        3,
+        'Индексы внешних ключей',
+        [f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})' for name, table, column in FOREIGN_KEY_INDEXES],
+        [f'DROP INDEX IF EXISTS {name}' for name, _, _ in FOREIGN_KEY_INDEXES],
+    ),
+    Migration(
+        4,
+        'Полнотекстовый индекс резюме',
+        [
+            "CREATE VIRTUAL TABLE resume_search USING fts5("
+            "skills, slogan, languages, jobs, schools, location, tokenize='unicode61 remove_diacritics 2')",
+            rebuild_index,
+        ],
+        ['DROP TABLE resume_search'],
+    ),
+    Migration(
+        5,
+        'Индекс для постраничного списка резюме',
+        ['CREATE INDEX IF NOT EXISTS ix_resumes_user_id_updated_on_id ON resumes (user_id, updated_on, id)'],
+        ['DROP INDEX IF EXISTS ix_resumes_user_id_updated_on_id'],
+    ),
+    Migration(
+        6,
+        'Один раздел каждого типа на резюме',
+        [compact_sections, rebuild_index] + [
+            step
+            for name, table in SINGLE_SECTION_INDEXES
+            for step in (f'DROP INDEX IF EXISTS {name}', f'CREATE UNIQUE INDEX {name} ON {table} (resume_id)')
+        ],
+        [
+            step
+            for name, table in SINGLE_SECTION_INDEXES
+            for step in (f'DROP INDEX IF EXISTS {name}', f'CREATE INDEX {name} ON {table} (resume_id)')
+        ],
+    ),
+    Migration(
+        7,
+        'Версия содержимого резюме',
+        ['ALTER TABLE resumes ADD COLUMN version INTEGER NOT NULL DEFAULT 1'],
+        ['ALTER TABLE resumes DROP COLUMN version'],
+    ),
+    Migration(
+        8,
+        'Снимки документов резюме',
+        [
+            '''
+            CREATE TABLE resume_snapshots (
+                resume_id INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                document TEXT NOT NULL,
+                PRIMARY KEY (resume_id),
+                FOREIGN KEY(resume_id) REFERENCES resumes (id) ON DELETE CASCADE
+            )
+            ''',
+            rebuild_snapshots,
+        ],
+        ['DROP TABLE resume_snapshots'],
+    ),
+]
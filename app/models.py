@@ -23,14 +23,24 @@ class Resume(db.Model):
     name = db.Column(db.String(255), nullable=False)
     created_on = db.Column(db.DateTime(), default=datetime.now)
     updated_on = db.Column(db.DateTime(), default=datetime.now, onupdate=datetime.now)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
-    personal = db.relationship('Personal', backref='resume', uselist=False, cascade='all, delete-orphan')
-    specialization = db.relationship('Specialization', backref='resume', uselist=False, cascade='all, delete-orphan')
-    experience = db.relationship('Experience', backref='resume', uselist=False, cascade='all, delete-orphan')
-    education = db.relationship('Education', backref='resume', uselist=False, cascade='all, delete-orphan')
-    contact = db.relationship('Contact', backref='resume', uselist=False, cascade='all, delete-orphan')
+    # Увеличивается при любом изменении резюме или его разделов, см. app.tracking
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
+    personal = db.relationship(
+        'Personal', backref='resume', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    specialization = db.relationship(
+        'Specialization', backref='resume', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    experience = db.relationship(
+        'Experience', backref='resume', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    education = db.relationship(
+        'Education', backref='resume', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
+    contact = db.relationship(
+        'Contact', backref='resume', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
 
     __tablename__ = 'resumes'
+    __table_args__ = (
+        db.Index('ix_resumes_user_id_updated_on_id', 'user_id', 'updated_on', 'id'),
+    )
 
     def __repr__(self):
         return self.name
@@ -49,7 +59,7 @@ class Personal(db.Model):
     about = db.Column(db.String(100))
     created_on = db.Column(db.DateTime(), default=datetime.now)
     updated_on = db.Column(db.DateTime(), default=datetime.now, onupdate=datetime.now)
-    resume_id = db.Column(db.Integer, db.ForeignKey('resumes.id', ondelete='CASCADE'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resumes.id', ondelete='CASCADE'), index=True, unique=True)
 
     __tablename__ = 'personal'
     __table_args__ = (
@@ -73,7 +83,7 @@ class Specialization(db.Model):
     relocation_ready = db.Column(db.Boolean, default=False)
     created_on = db.Column(db.DateTime(), default=datetime.now)
     updated_on = db.Column(db.DateTime(), default=datetime.now, onupdate=datetime.now)
-    resume_id = db.Column(db.Integer, db.ForeignKey('resumes.id', ondelete='CASCADE'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resumes.id', ondelete='CASCADE'), index=True, unique=True)
 
 
     __tablename__ = 'specializations'
@@ -100,8 +110,8 @@ class Experience(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     created_on = db.Column(db.DateTime(), default=datetime.now)
     updated_on = db.Column(db.DateTime(), default=datetime.now, onupdate=datetime.now)
-    jobs = db.relationship('Job', backref='experience', cascade='all, delete-orphan')
-    resume_id = db.Column(db.Integer, db.ForeignKey('resumes.id', ondelete='CASCADE'))
+    jobs = db.relationship('Job', backref='experience', cascade='all, delete-orphan', passive_deletes=True)
+    resume_id = db.Column(db.Integer, db.ForeignKey('resumes.id', ondelete='CASCADE'), index=True, unique=True)
 
     __tablename__ = 'experiences'
 
@@ -122,7 +132,7 @@ class Job(db.Model):
     skills = db.Column(db.String(255))
     created_on = db.Column(db.DateTime(), default=datetime.now)
     updated_on = db.Column(db.DateTime(), default=datetime.now, onupdate=datetime.now)
-    experience_id = db.Column(db.Integer, db.ForeignKey('experiences.id', ondelete='CASCADE'))
+    experience_id = db.Column(db.Integer, db.ForeignKey('experiences.id', ondelete='CASCADE'), index=True)
 
     __tablename__ = 'jobs'
     __table_args__ = (
@@ -144,8 +154,8 @@ class Education(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     created_on = db.Column(db.DateTime(), default=datetime.now)
     updated_on = db.Column(db.DateTime(), default=datetime.now, onupdate=datetime.now)
-    schools = db.relationship('School', backref='education', cascade='all, delete-orphan')
-    resume_id = db.Column(db.Integer, db.ForeignKey('resumes.id', ondelete='CASCADE'))
+    schools = db.relationship('School', backref='education', cascade='all, delete-orphan', passive_deletes=True)
+    resume_id = db.Column(db.Integer, db.ForeignKey('resumes.id', ondelete='CASCADE'), index=True, unique=True)
 
     __tablename__ = 'educations'
 
@@ -162,7 +172,7 @@ class School(db.Model):
     practice = db.Column(db.String(255))
     created_on = db.Column(db.DateTime(), default=datetime.now)
     updated_on = db.Column(db.DateTime(), default=datetime.now, onupdate=datetime.now)
-    education_id = db.Column(db.Integer, db.ForeignKey('educations.id', ondelete='CASCADE'))
+    education_id = db.Column(db.Integer, db.ForeignKey('educations.id', ondelete='CASCADE'), index=True)
 
     __tablename__ = 'schools'
 
@@ -178,9 +188,23 @@ class Contact(db.Model):
     sn_profile = db.Column(db.String(120), unique=True)
     created_on = db.Column(db.DateTime(), default=datetime.now)
     updated_on = db.Column(db.DateTime(), default=datetime.now, onupdate=datetime.now)
-    resume_id = db.Column(db.Integer, db.ForeignKey('resumes.id', ondelete='CASCADE'))
+    resume_id = db.Column(db.Integer, db.ForeignKey('resumes.id', ondelete='CASCADE'), index=True, unique=True)
 
     __tablename__ = 'contacts'
 
     def __repr__(self):
         return self.phone or self.email or self.telegram or self.sn_profile
+
+
+class Upload(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(200), unique=True, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    created_on = db.Column(db.DateTime(), default=datetime.now)
+    updated_on = db.Column(db.DateTime(), default=datetime.now, onupdate=datetime.now)
+
+    __tablename__ = 'uploads'
+
+    def __repr__(self):
+        return self.path
@@ -0,0 +1,176 @@
+"""Серверная выгрузка резюме в PDF.
+
+HTML страницы печати рендерится в процессе веб-приложения, а PDF из него строится
+в ограниченном пуле процессов. Готовые файлы кэшируются на диске под хешем HTML,
+так что неизменившееся резюме повторно не рендерится.
+"""
+import hashlib
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from flask import Blueprint, Response, abort, current_app, render_template, request, send_file, stream_with_context
+from flask_login import current_user, login_required
+
+from app import db
+from app.assets import DIST_FOLDER, STATIC_FOLDER
+from app.models import Resume
+from app.queries import load_resume_graph
+
+try:
+    import weasyprint
+except (ImportError, OSError):  # WeasyPrint не установлен или нет системных библиотек
+    weasyprint = None
+
+
+CHUNK_SIZE = 64 * 1024
+
+_executor = None
+
+bp = Blueprint('printing', __name__)
+
+
+def _fetch_url(static_folder, url):
+    # Статика и собранные наборы берутся прямо с диска, без HTTP-запросов к самому приложению
+    for prefix, folder in (('/static/', static_folder), ('/assets/', DIST_FOLDER)):
+        if url.startswith(prefix):
+            url = 'file://' + os.path.join(folder, url[len(prefix):].split('?', 1)[0])
+            break
+
+    return weasyprint.default_url_fetcher(url)
+
+
+def render_pdf(html, static_folder, path):
+    """Строит PDF из HTML и атомарно записывает его в path. Выполняется в отдельном процессе."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+    os.close(fd)
+
+    try:
+        weasyprint.HTML(string=html, base_url='/', url_fetcher=partial(_fetch_url, static_folder)).write_pdf(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return path
+
+
+def _get_executor():
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=current_app.config['PDF_WORKERS'])
+
+    return _executor
+
+
+def _render_html(resume_id):
+    # Импорт здесь, чтобы не было циклического импорта views -> pdf
+    from app.views import render_resume_sections
+
+    resume = load_resume_graph(resume_id)
+    sections = render_resume_sections(resume)
+
+    return render_template('list_resume.html', resume_id=resume_id, resume=resume, sections=sections)
+
+
+def submit_pdf(resume_id):
+    """Возвращает (путь к PDF, future или None). Future есть, только если PDF еще строится."""
+    html = _render_html(resume_id)
+    # Версия содержимого - хеш итогового HTML: любое изменение разделов или шаблона дает новый файл
+    path = os.path.join(current_app.config['PDF_CACHE_FOLDER'], hashlib.sha256(html.encode('utf-8')).hexdigest() + '.pdf')
+
+    if os.path.exists(path):
+        return path, None
+
+    os.makedirs(current_app.config['PDF_CACHE_FOLDER'], exist_ok=True)
+    return path, _get_executor().submit(render_pdf, html, STATIC_FOLDER, path)
+
+
+def _owned_resumes(resume_ids):
+    return (
+        db.session.query(Resume.id, Resume.name)
+        .filter(Resume.user_id == current_user.get_id(), Resume.id.in_(resume_ids))
+        .order_by(Resume.id)
+        .all()
+    )
+
+
+@bp.route('/export_pdf/<int:resume_id>/')
+@login_required
+def export_pdf(resume_id):
+    if weasyprint is None:
+        abort(501)
+
+    if not _owned_resumes([resume_id]):
+        abort(404)
+
+    path, future = submit_pdf(resume_id)
+    if future:
+        future.result()
+
+    return send_file(path, mimetype='application/pdf', as_attachment=True, attachment_filename=f'resume_{resume_id}.pdf')
+
+
+class _ZipStream:
+    """Файлоподобный объект без seek: zipfile пишет в него, а генератор забирает накопленные байты."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer.extend(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _generate_zip(resumes):
+    stream = _ZipStream()
+    window = current_app.config['PDF_WORKERS'] * 2
+
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_STORED) as archive:
+        for index in range(0, len(resumes), window):
+            # Одновременно в пуле не больше window резюме, поэтому память не зависит от размера пакета
+            pending = [(resume, *submit_pdf(resume.id)) for resume in resumes[index:index + window]]
+
+            for resume, path, future in pending:
+                if future:
+                    future.result()
+
+                with open(path, 'rb') as source, archive.open(f'resume_{resume.id}.pdf', 'w') as target:
+                    for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                        target.write(chunk)
+                        yield stream.drain()
+
+                yield stream.drain()
+
+    yield stream.drain()
+
+
+@bp.route('/export_pdf/', methods=['POST'])
+@login_required
+def export_pdf_batch():
+    """Выгружает несколько резюме одним zip-архивом, который отдается по частям."""
+    if weasyprint is None:
+        abort(501)
+
+    resume_ids = request.form.getlist('resume_id', type=int) or (request.get_json(silent=True) or {}).get('ids', [])
+    resumes = _owned_resumes(resume_ids)
+
+    if not resumes:
+        abort(404)
+
+    return Response(
+        stream_with_context(_generate_zip(resumes)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': 'attachment; filename=resumes.zip'},
+    )
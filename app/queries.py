@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import Resume, Experience, Education
+
+
+def load_resume_graph(resume_id):
+    """Загружает резюме вместе со всеми разделами за два запроса к базе."""
+    return (
+        db.session.query(Resume)
+        .options(
+            joinedload(Resume.personal),
+            joinedload(Resume.specialization),
+            joinedload(Resume.contact),
+            joinedload(Resume.experience).joinedload(Experience.jobs),
+            joinedload(Resume.education).selectinload(Education.schools),
+        )
+        .filter_by(id=resume_id)
+        .first()
+    )
+
+
+def encode_cursor(row):
+    return f'{row.updated_on.isoformat()}~{row.id}'
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор страницы; некорректный курсор означает первую страницу."""
+    try:
+        updated_on, resume_id = cursor.rsplit('~', 1)
+        return datetime.fromisoformat(updated_on), int(resume_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def resume_index_page(user_id, after=None, before=None, per_page=50):
+    """Страница списка резюме пользователя: только id, name и updated_on, без ORM-объектов.
+
+    Постраничная навигация по ключу (updated_on, id) от новых к старым: after - курсор
+    последней строки предыдущей страницы, before - курсор первой строки следующей.
+    Возвращает (строки, курсор следующей страницы, курсор предыдущей страницы).
+    """
+    key = tuple_(Resume.updated_on, Resume.id)
+    query = db.session.query(Resume.id, Resume.name, Resume.updated_on).filter(Resume.user_id == user_id)
+    after, before = decode_cursor(after), decode_cursor(before)
+
+    if before:
+        rows = (
+            query.filter(key > before)
+            .order_by(Resume.updated_on.asc(), Resume.id.asc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        next_cursor = encode_cursor(rows[-1]) if rows else None
+        prev_cursor = encode_cursor(rows[0]) if rows and has_more else None
+    else:
+        if after:
+            query = query.filter(key < after)
+        rows = query.order_by(Resume.updated_on.desc(), Resume.id.desc()).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1]) if rows and has_more else None
+        prev_cursor = encode_cursor(rows[0]) if rows and after else None
+
+    return rows, next_cursor, prev_cursor
@@ -0,0 +1,84 @@
+"""Полнотекстовый поиск по резюме на SQLite FTS5.
+
+Индекс resume_search содержит по одной строке на резюме, rowid совпадает с id резюме.
+"""
+import re
+
+from sqlalchemy import text
+
+from app import db
+from app.tracking import on_resume_change
+
+
+# Документ для индекса собирается одним запросом; сортировка не важна, поэтому group_concat без ORDER BY
+DOCUMENT_SELECT = '''
+    SELECT
+        resumes.id,
+        specializations.skills,
+        specializations.slogan,
+        specializations.languages,
+        (
+            SELECT group_concat(
+                coalesce(jobs.name, '') || ' ' || coalesce(jobs.position, '') || ' ' ||
+                coalesce(jobs.about, '') || ' ' || coalesce(jobs.skills, ''), ' ')
+            FROM jobs JOIN experiences ON experiences.id = jobs.experience_id
+            WHERE experiences.resume_id = resumes.id
+        ),
+        (
+            SELECT group_concat(coalesce(schools.name, '') || ' ' || coalesce(schools.course, ''), ' ')
+            FROM schools JOIN educations ON educations.id = schools.education_id
+            WHERE educations.resume_id = resumes.id
+        ),
+        personal.location
+    FROM resumes
+    LEFT JOIN specializations ON specializations.resume_id = resumes.id
+    LEFT JOIN personal ON personal.resume_id = resumes.id
+'''
+
+INSERT_DOCUMENTS = (
+    'INSERT INTO resume_search (rowid, skills, slogan, languages, jobs, schools, location) ' + DOCUMENT_SELECT)
+
+SEARCH_QUERY = text('''
+    SELECT resumes.id, resumes.name, snippet(resume_search, -1, '[', ']', '…', 12) AS snippet
+    FROM resume_search
+    JOIN resumes ON resumes.id = resume_search.rowid
+    WHERE resume_search MATCH :query AND resumes.user_id = :user_id
+    ORDER BY bm25(resume_search, 3.0, 2.0, 1.0, 2.0, 1.0, 1.0)
+    LIMIT :limit OFFSET :offset
+''')
+
+
+@on_resume_change
+def reindex(connection, resume_ids):
+    """Перестраивает строки индекса для указанных резюме; удаленные резюме просто исчезают из индекса."""
+    placeholders = ', '.join(str(int(resume_id)) for resume_id in resume_ids)
+
+    connection.exec_driver_sql(f'DELETE FROM resume_search WHERE rowid IN ({placeholders})')
+    connection.exec_driver_sql(f'{INSERT_DOCUMENTS} WHERE resumes.id IN ({placeholders})')
+
+
+def rebuild_index(connection):
+    connection.exec_driver_sql('DELETE FROM resume_search')
+    connection.exec_driver_sql(INSERT_DOCUMENTS)
+    connection.exec_driver_sql("INSERT INTO resume_search (resume_search) VALUES ('optimize')")
+
+    return connection.exec_driver_sql('SELECT count(*) FROM resume_search').scalar()
+
+
+def build_match_query(query):
+    """Превращает пользовательскую строку в выражение FTS5: все слова обязательны, с поиском по префиксу."""
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_resumes(query, user_id, page=1, per_page=20):
+    """Ищет среди резюме пользователя user_id."""
+    match = build_match_query(query)
+
+    if not match:
+        return []
+
+    rows = db.session.execute(
+        SEARCH_QUERY, {'query': match, 'user_id': user_id, 'limit': per_page, 'offset': (page - 1) * per_page})
+
+    return [dict(row._mapping) for row in rows]
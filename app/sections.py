@@ -0,0 +1,211 @@
+from flask import Blueprint, render_template, redirect, url_for, request
+from flask_login import login_required
+from sqlalchemy import delete, select
+
+from app import db
+from app.cache import invalidate_fragment
+from app.conditional import conditional_resume
+from app.database import retry_on_busy
+from app.models import Experience, Job, Education, School
+from app.tracking import mark_resume_changed
+from app.views import find_section, ensure_section
+from .forms import JobForm, SchoolForm
+
+
+bp = Blueprint('sections', __name__)
+
+
+# Модель -> (раздел, колонка со ссылкой на раздел)
+CHILDREN = {
+    Job: (Experience, 'experience_id'),
+    School: (Education, 'education_id'),
+}
+
+
+def delete_child(model, row_id, parent_id, resume_id):
+    """Удаляет место работы или учебы одним DELETE, не загружая строку в сессию."""
+    parent, column = CHILDREN[model]
+    parent_column = model.__table__.c[column]
+    db.session.execute(
+        delete(model.__table__).where(
+            model.id == row_id,
+            parent_column == parent_id,
+            parent_column.in_(select(parent.id).where(parent.resume_id == resume_id)),
+        )
+    )
+    mark_resume_changed(resume_id)
+
+
+# @bp.route('/experience/')
+# @login_required
+# def experience():
+#     return render_template('experience.html', active_page='experience')
+
+@bp.route('/resumes/<int:resume_id>/create_experience/', methods=['GET', 'POST'])
+@login_required
+@retry_on_busy
+def create_experience(resume_id):
+    if request.method == 'POST':
+        ensure_section(Experience, resume_id)
+        db.session.commit()
+
+    return redirect(url_for('sections.edit_experience', resume_id=resume_id))
+
+
+@bp.route('/resumes/<int:resume_id>/edit_experience/', methods=['GET', 'POST'])
+@login_required
+@conditional_resume
+def edit_experience(resume_id):
+    experience = find_section(Experience, resume_id)
+
+    # Раздел создается вместе с первым местом работы, поэтому здесь ничего не записывается
+    return render_template(
+        'experience.html',
+        resume_id=resume_id,
+        experience_id=experience.id if experience else 0,
+        jobs=[{'id': job.id, 'name': job.name} for job in experience.jobs] if experience else [],
+        active_page='experience',
+    )
+
+
+@bp.route('/resumes/<int:resume_id>/edit_experience/<int:experience_id>/create_job/', methods=['GET', 'POST'])
+@login_required
+@retry_on_busy
+def create_job(resume_id, experience_id):
+    form = JobForm(request.form)
+
+    if form.validate_on_submit():
+        experience = ensure_section(Experience, resume_id)
+        job = Job(experience_id=experience.id)
+        form.populate_obj(job)
+        db.session.add(job)
+        db.session.commit()
+        invalidate_fragment('jobs', experience.id)
+
+        return redirect(url_for('sections.edit_experience', resume_id=resume_id))
+
+    return render_template('job.html', resume_id=resume_id, form=form)
+
+@bp.route('/resumes/<int:resume_id>/edit_experience/<int:experience_id>/edit_job/<int:job_id>/', methods=['GET', 'POST'])
+@login_required
+@retry_on_busy
+@conditional_resume
+def edit_job(resume_id, experience_id, job_id):
+    job = db.session.query(Job).filter_by(id=job_id).first()
+
+    form = JobForm(request.form, obj=job)
+
+    if form.validate_on_submit():
+        form.populate_obj(job)
+        db.session.commit()
+        invalidate_fragment('jobs', experience_id)
+
+        return redirect(url_for('sections.edit_experience', resume_id=resume_id))
+
+    return render_template(
+        'job.html',
+        resume_id=resume_id,
+        experience_id=experience_id,
+        job_id=job.id,
+        active_page='experience',
+        form=form,
+    )
+
+
+@bp.route('/resumes/<int:resume_id>/edit_experience/<int:experience_id>/delete_job/<int:job_id>/', methods=['GET', 'POST'])
+@login_required
+@retry_on_busy
+def delete_job(resume_id, experience_id, job_id):
+    delete_child(Job, job_id, experience_id, resume_id)
+    db.session.commit()
+    invalidate_fragment('jobs', experience_id)
+
+    return redirect(url_for('sections.edit_experience', resume_id=resume_id))
+
+
+# @bp.route('/education/')
+# @login_required
+# def education():
+#     return render_template('education.html', active_page='education')
+
+@bp.route('/resumes/<int:resume_id>/create_education/', methods=['GET', 'POST'])
+@login_required
+@retry_on_busy
+def create_education(resume_id):
+    if request.method == 'POST':
+        ensure_section(Education, resume_id)
+        db.session.commit()
+
+    return redirect(url_for('sections.edit_education', resume_id=resume_id))
+
+
+@bp.route('/resumes/<int:resume_id>/edit_education/', methods=['GET', 'POST'])
+@login_required
+@conditional_resume
+def edit_education(resume_id):
+    education = find_section(Education, resume_id)
+
+    # Раздел создается вместе с первым местом учебы, поэтому здесь ничего не записывается
+    return render_template(
+        'education.html',
+        resume_id=resume_id,
+        education_id=education.id if education else 0,
+        schools=[{'id': school.id, 'name': school.name} for school in education.schools] if education else [],
+        active_page='education',
+    )
+
+
+@bp.route('/resumes/<int:resume_id>/edit_education/<int:education_id>/create_school/', methods=['GET', 'POST'])
+@login_required
+@retry_on_busy
+def create_school(resume_id, education_id):
+    form = SchoolForm(request.form)
+
+    if form.validate_on_submit():
+        education = ensure_section(Education, resume_id)
+        school = School(education_id=education.id)
+        form.populate_obj(school)
+        db.session.add(school)
+        db.session.commit()
+        invalidate_fragment('schools', education.id)
+
+        return redirect(url_for('sections.edit_education', resume_id=resume_id))
+
+    return render_template('school.html', resume_id=resume_id, form=form)
+
+
+@bp.route('/resumes/<int:resume_id>/edit_education/<int:education_id>/edit_school/<int:school_id>/', methods=['GET', 'POST'])
+@login_required
+@retry_on_busy
+@conditional_resume
+def edit_school(resume_id, education_id, school_id):
+    school = db.session.query(School).filter_by(id=school_id).first()
+
+    form = SchoolForm(request.form, obj=school)
+
+    if form.validate_on_submit():
+        form.populate_obj(school)
+        db.session.commit()
+        invalidate_fragment('schools', education_id)
+
+        return redirect(url_for('sections.edit_education', resume_id=resume_id))
+
+    return render_template(
+        'school.html',
+        resume_id=resume_id,
+        education_id=education_id,
+        school_id=school.id,
+        active_page='education',
+        form=form,
+    )
+
+
+@bp.route('/resumes/<int:resume_id>/edit_experience/<int:education_id>/delete_school/<int:school_id>/', methods=['GET', 'POST'])
+@login_required
+@retry_on_busy
+def delete_school(resume_id, education_id, school_id):
+    delete_child(School, school_id, education_id, resume_id)
+    db.session.commit()
+    invalidate_fragment('schools', education_id)
+
+    return redirect(url_for('sections.edit_education', resume_id=resume_id))
@@ -0,0 +1,233 @@
+"""Pre-fork HTTP-сервер для runner.py serve.
+
+Мастер-процесс создает приложение и слушающий сокет, затем запускает воркеры
+через fork. Каждый воркер открывает свое соединение с базой, загружает шаблоны
+и только после этого начинает принимать запросы и сообщает мастеру о готовности.
+
+Сигналы мастеру:
+    TERM, INT - дождаться завершения текущих запросов и остановиться;
+    HUP       - плавный перезапуск: мастер перезапускает себя через exec с новым кодом,
+                сохраняя сокет, и останавливает старые воркеры, когда новые готовы.
+"""
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import time
+import traceback
+
+from flask import Blueprint, _app_ctx_stack, _request_ctx_stack, current_app
+from sqlalchemy import text
+from werkzeug.serving import BaseWSGIServer
+
+from app import db
+from app.templating import load_templates
+
+
+LISTEN_FD_ENV = 'SERVE_LISTEN_FD'
+OLD_WORKERS_ENV = 'SERVE_OLD_WORKERS'
+POLL_INTERVAL = 0.5
+
+bp = Blueprint('health', __name__)
+
+
+@bp.route('/ready')
+def ready():
+    """Проверка готовности: 200 только в воркере, который уже загрузил шаблоны и соединился с базой."""
+    if current_app.extensions.get('warm'):
+        return 'ok'
+
+    return 'warming up', 503
+
+
+def warm_up(app):
+    with app.app_context():
+        db.session.execute(text('SELECT 1'))
+        db.session.remove()
+        load_templates(app)
+
+    app.extensions['warm'] = True
+
+
+def _log(message):
+    print(f'[{os.getpid()}] {message}', file=sys.stderr, flush=True)
+
+
+class _WorkerServer(BaseWSGIServer):
+    handled = 0
+
+    def process_request(self, request, client_address):
+        super().process_request(request, client_address)
+        self.handled += 1
+
+
+def _run_worker(app, host, listener, ready_fd, max_requests):
+    master = os.getppid()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    # Ctrl+C получает вся группа процессов, останавливает воркеры мастер
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    # Команды Flask-Script выполняются внутри тестового контекста запроса; воркеру он не нужен,
+    # иначе запросы переиспользовали бы контекст приложения мастера вместе с сессией базы
+    while _request_ctx_stack.top is not None:
+        _request_ctx_stack.top.pop()
+    while _app_ctx_stack.top is not None:
+        _app_ctx_stack.top.pop()
+
+    warm_up(app)
+    server = _WorkerServer(host, 0, app, fd=listener.fileno())
+    server.timeout = POLL_INTERVAL
+    os.write(ready_fd, b'1')
+    os.close(ready_fd)
+
+    while not stopping and os.getppid() == master and not (max_requests and server.handled >= max_requests):
+        server.handle_request()
+
+    server.server_close()
+
+
+class Arbiter:
+    """Мастер-процесс: держит нужное число готовых воркеров и обрабатывает сигналы."""
+
+    def __init__(self, app, host, port, workers, max_requests, max_requests_jitter, graceful_timeout):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers_count = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}
+        self.warming = {}
+        self.old_workers = [int(pid) for pid in os.environ.pop(OLD_WORKERS_ENV, '').split(',') if pid]
+        self.signal = None
+
+    def _listen(self):
+        if LISTEN_FD_ENV in os.environ:
+            # Сокет унаследован от предыдущего мастера: соединения в очереди не теряются
+            listener = socket.socket(fileno=int(os.environ.pop(LISTEN_FD_ENV)))
+        else:
+            listener = socket.socket(socket.AF_INET6 if ':' in self.host else socket.AF_INET)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((self.host, self.port))
+            listener.listen(2048)
+
+        # Все воркеры ждут на одном сокете: accept у опоздавшего воркера не должен блокироваться
+        listener.setblocking(False)
+        return listener
+
+    def _spawn(self):
+        ready_read, ready_write = os.pipe()
+        max_requests = self.max_requests
+        if max_requests:
+            # Разброс, чтобы воркеры не перезапускались одновременно
+            max_requests += random.randint(0, self.max_requests_jitter)
+
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            code = 0
+            try:
+                _run_worker(self.app, self.host, self.listener, ready_write, max_requests)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+
+        os.close(ready_write)
+        self.warming[ready_read] = pid
+        self.workers[pid] = time.monotonic()
+
+    def _handle_signal(self, signum, frame):
+        self.signal = signum
+
+    def _collect_ready(self):
+        if not self.warming:
+            time.sleep(POLL_INTERVAL)
+            return
+
+        readable, _, _ = select.select(list(self.warming), [], [], POLL_INTERVAL)
+        for fd in readable:
+            pid = self.warming.pop(fd)
+            if os.read(fd, 1) == b'1':
+                _log(f'воркер {pid} готов')
+            os.close(fd)
+
+        if not self.warming and self.old_workers:
+            # Новые воркеры готовы: старые дорабатывают текущие запросы и завершаются
+            self._kill(self.old_workers, signal.SIGTERM)
+            self.old_workers = []
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+
+            started = self.workers.pop(pid, None)
+            failed = not (os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0)
+            if started is not None and failed and time.monotonic() - started < 1:
+                # Воркер падает при запуске: не перезапускаем его в цикле без паузы
+                time.sleep(1)
+
+    def _kill(self, pids, signum):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _stop(self):
+        self._kill(list(self.workers) + self.old_workers, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout
+
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+
+        self._kill(list(self.workers), signal.SIGKILL)
+        _log('сервер остановлен')
+
+    def _reload(self):
+        _log('перезапуск')
+        self.listener.set_inheritable(True)
+        os.environ[LISTEN_FD_ENV] = str(self.listener.fileno())
+        os.environ[OLD_WORKERS_ENV] = ','.join(map(str, list(self.workers) + self.old_workers))
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+    def run(self):
+        self.listener = self._listen()
+        host, port = self.listener.getsockname()[:2]
+        _log(f'слушаю http://{host}:{port}, воркеров: {self.workers_count}')
+
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self._handle_signal)
+
+        while True:
+            if self.signal in (signal.SIGTERM, signal.SIGINT):
+                self._stop()
+                return
+            if self.signal == signal.SIGHUP:
+                self._reload()
+
+            self._reap()
+            while len(self.workers) < self.workers_count:
+                self._spawn()
+            self._collect_ready()
+
+
+def serve(app, host, port, workers, max_requests=0, max_requests_jitter=0, graceful_timeout=30):
+    Arbiter(app, host, port, workers, max_requests, max_requests_jitter, graceful_timeout).run()
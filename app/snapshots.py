@@ -0,0 +1,188 @@
+"""Снимки документов резюме.
+
+В resume_snapshots хранится каждое резюме, собранное в компактный JSON, вместе с версией,
+по которой он собран. Снимки перестраиваются в той же транзакции, что и изменение резюме,
+поэтому чтение документа - одна выборка по первичному ключу вместо запросов к семи таблицам.
+"""
+import json
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from flask import current_app
+from sqlalchemy import select, text
+
+from app import db
+from app.documents import load_documents
+from app.models import Resume
+from app.tracking import on_resume_change
+
+
+UPSERT_SNAPSHOT = text('''
+    INSERT INTO resume_snapshots (resume_id, version, document) VALUES (:resume_id, :version, :document)
+    ON CONFLICT (resume_id) DO UPDATE SET version = excluded.version, document = excluded.document
+    WHERE excluded.version >= resume_snapshots.version
+''')
+
+STORED_SNAPSHOTS = text(
+    'SELECT resume_id, version, document FROM resume_snapshots WHERE resume_id IN (SELECT value FROM json_each(:ids))')
+
+SNAPSHOT_QUERY = text('''
+    SELECT resume_snapshots.document
+    FROM resume_snapshots
+    JOIN resumes ON resumes.id = resume_snapshots.resume_id
+    WHERE resume_snapshots.resume_id = :resume_id AND resumes.user_id = :user_id
+''')
+
+
+def serialize(document):
+    return json.dumps(document, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def build_snapshots(connection, resume_ids):
+    """Собирает снимки указанных резюме: [{'resume_id', 'version', 'document'}]."""
+    versions = dict(connection.execute(select(Resume.id, Resume.version).where(Resume.id.in_(resume_ids))).all())
+    documents = load_documents(connection, list(versions))
+
+    return [
+        {'resume_id': resume_id, 'version': versions[resume_id], 'document': serialize(document)}
+        for resume_id, document in documents.items()
+    ]
+
+
+def write_snapshots(connection, snapshots):
+    # Снимок более новой версии, записанный параллельно, не перезаписывается
+    if snapshots:
+        connection.execute(UPSERT_SNAPSHOT, snapshots)
+
+
+# Регистрируется после увеличения версии в app.tracking, поэтому снимок получает новую версию;
+# снимки удаленных резюме удаляет ON DELETE CASCADE
+@on_resume_change
+def refresh(connection, resume_ids):
+    write_snapshots(connection, build_snapshots(connection, resume_ids))
+
+
+def get_snapshot(resume_id, user_id):
+    """JSON-документ резюме пользователя или None, если резюме нет или снимок еще не построен."""
+    return db.session.execute(SNAPSHOT_QUERY, {'resume_id': resume_id, 'user_id': user_id}).scalar()
+
+
+def _batches(ids, batch_size):
+    for start in range(0, len(ids), batch_size):
+        yield ids[start:start + batch_size]
+
+
+def rebuild_snapshots(connection, batch_size=500):
+    """Перестраивает все снимки в одном соединении. Используется миграцией."""
+    ids = connection.execute(select(Resume.id).order_by(Resume.id)).scalars().all()
+
+    for batch in _batches(ids, batch_size):
+        write_snapshots(connection, build_snapshots(connection, batch))
+
+    return len(ids)
+
+
+_worker_app = None
+
+
+def _init_worker():
+    # Соединения из пула мастера не должны использоваться в двух процессах
+    with _worker_app.app_context():
+        db.engine.dispose(close=False)
+
+
+def _build_batch(resume_ids):
+    with _worker_app.app_context():
+        with db.engine.connect() as connection:
+            return build_snapshots(connection, resume_ids)
+
+
+def rebuild_all(workers=None, batch_size=500):
+    """Перестраивает все снимки: документы собираются пачками в workers процессах,
+    а записываются в основном процессе - SQLite все равно допускает только одного писателя.
+
+    Возвращает число записанных снимков.
+    """
+    global _worker_app
+
+    db.session.execute(text('DELETE FROM resume_snapshots WHERE resume_id NOT IN (SELECT id FROM resumes)'))
+    ids = db.session.execute(select(Resume.id).order_by(Resume.id)).scalars().all()
+    db.session.commit()
+    db.session.remove()
+
+    batches = list(_batches(ids, batch_size))
+    count = 0
+
+    def write(snapshots):
+        nonlocal count
+        with db.engine.begin() as connection:
+            write_snapshots(connection, snapshots)
+        count += len(snapshots)
+
+    # База в памяти не видна другим процессам
+    if workers == 1 or db.engine.url.database in (None, '', ':memory:'):
+        for batch in batches:
+            with db.engine.connect() as connection:
+                snapshots = build_snapshots(connection, batch)
+            write(snapshots)
+        return count
+
+    # Воркеры получают приложение при fork и открывают собственные соединения
+    _worker_app = current_app._get_current_object()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('fork'), initializer=_init_worker) as executor:
+        for snapshots in executor.map(_build_batch, batches):
+            write(snapshots)
+
+    return count
+
+
+def find_drift(batch_size=500):
+    """Сравнивает снимки с документами, собранными из таблиц, в одной читающей транзакции.
+
+    Возвращает словарь списков id: missing - резюме без снимка, stale - снимок другой версии,
+    different - версия та же, но содержимое расходится, orphaned - снимки удаленных резюме.
+    """
+    drift = {'missing': [], 'stale': [], 'different': [], 'orphaned': []}
+
+    with db.engine.connect() as connection, connection.begin():
+        drift['orphaned'] = connection.execute(text(
+            'SELECT resume_id FROM resume_snapshots WHERE resume_id NOT IN (SELECT id FROM resumes)'
+        )).scalars().all()
+        ids = connection.execute(select(Resume.id).order_by(Resume.id)).scalars().all()
+
+        for batch in _batches(ids, batch_size):
+            stored = {
+                row.resume_id: row for row in connection.execute(STORED_SNAPSHOTS, {'ids': json.dumps(batch)})
+            }
+
+            for snapshot in build_snapshots(connection, batch):
+                row = stored.get(snapshot['resume_id'])
+                if row is None:
+                    drift['missing'].append(snapshot['resume_id'])
+                elif row.version != snapshot['version']:
+                    drift['stale'].append(snapshot['resume_id'])
+                elif row.document != snapshot['document']:
+                    drift['different'].append(snapshot['resume_id'])
+
+    return drift
+
+
+def repair_drift(drift):
+    """Перестраивает расходящиеся снимки и удаляет лишние. Возвращает число исправленных."""
+    resume_ids = drift['missing'] + drift['stale'] + drift['different']
+
+    with db.engine.begin() as connection:
+        if drift['orphaned']:
+            connection.execute(
+                text('DELETE FROM resume_snapshots WHERE resume_id IN (SELECT value FROM json_each(:ids))'),
+                {'ids': json.dumps(drift['orphaned'])},
+            )
+        for batch in _batches(resume_ids, 500):
+            # Содержимое могло разойтись при той же версии, поэтому запись безусловная
+            connection.execute(
+                text('DELETE FROM resume_snapshots WHERE resume_id IN (SELECT value FROM json_each(:ids))'),
+                {'ids': json.dumps(batch)},
+            )
+            write_snapshots(connection, build_snapshots(connection, batch))
+
+    return len(resume_ids) + len(drift['orphaned'])
@@ -0,0 +1,214 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, select, update
+
+from app import db
+from app.images import variant_files
+from app.models import Personal, Upload
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _blob_path(relative):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], *relative.split('/'))
+
+
+def _relative_path(digest, extension):
+    # Шардирование по первым байтам хеша, чтобы в одной папке не копились тысячи файлов
+    return posixpath.join(digest[:2], digest[2:4], f'{digest}.{extension}')
+
+
+def _stream_to_temp(stream, folder):
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+
+    try:
+        with os.fdopen(fd, 'wb') as temp:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                temp.write(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return digest.hexdigest(), temp_path
+
+
+def store_blob(file):
+    """Сохраняет загруженный файл под именем, производным от SHA-256 его содержимого.
+
+    Возвращает путь относительно UPLOAD_FOLDER. Если такой файл уже есть,
+    на диск ничего не записывается.
+    """
+    folder = current_app.config['UPLOAD_FOLDER']
+    extension = file.filename.rsplit('.', 1)[1].lower()
+    stream = file.stream
+
+    if stream.seekable():
+        # retry_on_busy может повторить view, и тогда поток уже прочитан до конца предыдущей попыткой
+        stream.seek(0)
+        # Первый проход только считает хеш, поэтому дубликат не пишется на диск вовсе
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+        stream.seek(0)
+
+        relative = _relative_path(digest.hexdigest(), extension)
+        target = _blob_path(relative)
+        if os.path.exists(target):
+            return relative
+
+        _, temp_path = _stream_to_temp(stream, folder)
+    else:
+        digest, temp_path = _stream_to_temp(stream, folder)
+        relative = _relative_path(digest, extension)
+        target = _blob_path(relative)
+        if os.path.exists(target):
+            os.remove(temp_path)
+            return relative
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(temp_path, target)
+
+    return relative
+
+
+def save_upload(file):
+    """Сохраняет файл и увеличивает счетчик ссылок на него. Возвращает значение для Personal.image."""
+    relative = store_blob(file)
+    upload = db.session.query(Upload).filter_by(path=relative).first()
+
+    if not upload:
+        upload = Upload(path=relative, size=os.path.getsize(_blob_path(relative)), refcount=0)
+        db.session.add(upload)
+
+    upload.refcount += 1
+
+    return relative
+
+
+def release_upload(path):
+    """Уменьшает счетчик ссылок на файл. Старые файлы без записи в uploads не трогаются."""
+    if not path:
+        return
+
+    upload = db.session.query(Upload).filter_by(path=path).first()
+
+    if upload and upload.refcount > 0:
+        upload.refcount -= 1
+
+
+def release_uploads(paths):
+    """Уменьшает счетчики ссылок на файлы из запроса paths одним UPDATE, не загружая записи."""
+    uploads = Upload.__table__
+    db.session.execute(
+        update(uploads)
+        .where(uploads.c.path.in_(paths), uploads.c.refcount > 0)
+        .values(refcount=uploads.c.refcount - 1, updated_on=datetime.now())
+    )
+
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(_blob_path(path))
+        except FileNotFoundError:
+            pass
+
+
+def reclaim_uploads(grace=None):
+    """Удаляет файлы, на которые больше не ссылается ни одна запись Personal.
+
+    Записи со счетчиком 0, измененные меньше grace секунд назад (по умолчанию UPLOAD_GC_GRACE),
+    не трогаются: такой файл мог только что снова понадобиться параллельному запросу.
+    Запись удаляется только если ее счетчик все еще 0, и лишь затем удаляется файл.
+    """
+    grace = current_app.config['UPLOAD_GC_GRACE'] if grace is None else grace
+    uploads = Upload.__table__
+    candidates = db.session.execute(
+        select(uploads.c.id, uploads.c.path)
+        .where(uploads.c.refcount <= 0, uploads.c.updated_on < datetime.now() - timedelta(seconds=grace))
+    ).all()
+
+    reclaimed = []
+    for upload_id, path in candidates:
+        result = db.session.execute(delete(uploads).where(uploads.c.id == upload_id, uploads.c.refcount <= 0))
+        if result.rowcount:
+            reclaimed.append(path)
+    db.session.commit()
+
+    for path in reclaimed:
+        _remove_files([path] + variant_files(path))
+
+    return len(reclaimed)
+
+
+def orphan_files(grace=None):
+    """Файлы в UPLOAD_FOLDER, на которые не ссылаются ни uploads, ни Personal.image, старше grace секунд.
+
+    Сюда попадают фото резюме, удаленных каскадом вместе с пользователем, и недописанные .part-файлы.
+    """
+    grace = current_app.config['UPLOAD_GC_GRACE'] if grace is None else grace
+    folder = current_app.config['UPLOAD_FOLDER']
+    referenced = set(db.session.execute(select(Upload.path)).scalars())
+    referenced.update(db.session.execute(select(Personal.image).where(Personal.image.isnot(None))).scalars())
+    referenced.update(variant for path in list(referenced) for variant in variant_files(path))
+    deadline = time.time() - grace
+
+    for root, _, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, folder).replace(os.sep, '/')
+            if relative not in referenced and os.path.getmtime(path) < deadline:
+                yield relative
+
+
+def reclaim_orphan_files(grace=None):
+    paths = list(orphan_files(grace))
+    _remove_files(paths)
+
+    return paths
+
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+
+def _sweep(app, interval):
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                reclaim_uploads()
+            except Exception:
+                app.logger.exception('Не удалось удалить файлы без ссылок')
+            finally:
+                db.session.remove()
+
+
+def _start_sweeper():
+    # Поток запускается при первом запросе: после fork в pre-fork сервере
+    # потоки родителя в дочернем процессе не работают, и каждый воркер запускает свой
+    global _sweeper
+
+    interval = current_app.config['UPLOAD_GC_INTERVAL']
+    if not interval or (_sweeper is not None and _sweeper.is_alive()):
+        return
+
+    with _sweeper_lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper = threading.Thread(
+                target=_sweep, args=(current_app._get_current_object(), interval), name='upload-gc', daemon=True)
+            _sweeper.start()
+
+
+def init_app(app):
+    app.before_request(_start_sweeper)
@@ -0,0 +1,27 @@
+import os
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache
+
+
+def init_app(app):
+    # Скомпилированный байткод шаблонов хранится на диске и общий для всех воркеров:
+    # новый процесс не разбирает и не компилирует шаблоны заново, а только загружает байткод.
+    # Ключ кэша включает абсолютный путь шаблона, поэтому компилировать нужно там же, где приложение запускается.
+    os.makedirs(app.config['TEMPLATE_CACHE_FOLDER'], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['TEMPLATE_CACHE_FOLDER'])
+
+    if app.config['TEMPLATE_WARMUP']:
+        # Шаблоны загружаются при создании приложения, то есть до того, как воркер начнет принимать запросы
+        load_templates(app)
+
+
+def load_templates(app=None):
+    """Загружает все шаблоны приложения в окружение Jinja, при необходимости компилируя их в кэш байткода."""
+    app = app or current_app
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html'))
+
+    for name in names:
+        app.jinja_env.get_template(name)
+
+    return names
@@ -0,0 +1,93 @@
+"""Отслеживание изменений резюме.
+
+Слушатели сессии собирают id резюме, затронутых при flush, и перед фиксацией
+транзакции передают их обработчикам, зарегистрированным через on_resume_change.
+Обработчики выполняются в той же транзакции, что и само изменение.
+Код, который пишет в базу в обход ORM, сообщает об изменениях через mark_resume_changed.
+"""
+from datetime import datetime
+
+from sqlalchemy import event, select, update
+
+from app import db
+from app.models import Resume, Personal, Specialization, Experience, Job, Education, School, Contact
+
+
+SESSION_KEY = 'changed_resume_ids'
+
+_handlers = []
+
+
+def on_resume_change(handler):
+    """Регистрирует обработчик handler(connection, resume_ids)."""
+    _handlers.append(handler)
+    return handler
+
+
+def notify_resume_change(connection, resume_ids):
+    resume_ids = sorted(set(resume_ids))
+
+    if resume_ids:
+        for handler in _handlers:
+            handler(connection, resume_ids)
+
+
+def mark_resume_changed(*resume_ids, session=None):
+    session = session or db.session
+    session.info.setdefault(SESSION_KEY, set()).update(resume_ids)
+
+
+@on_resume_change
+def bump_versions(connection, resume_ids):
+    # Изменение места работы, учебы или контактов тоже считается изменением резюме
+    resumes = Resume.__table__
+    connection.execute(
+        update(resumes)
+        .where(resumes.c.id.in_(resume_ids))
+        .values(version=resumes.c.version + 1, updated_on=datetime.now())
+    )
+
+
+def _resume_ids(session, objects):
+    resume_ids, experience_ids, education_ids = set(), set(), set()
+
+    for obj in objects:
+        if isinstance(obj, Resume):
+            resume_ids.add(obj.id)
+        elif isinstance(obj, (Personal, Specialization, Experience, Education, Contact)):
+            resume_ids.add(obj.resume_id)
+        elif isinstance(obj, Job):
+            experience_ids.add(obj.experience_id)
+        elif isinstance(obj, School):
+            education_ids.add(obj.education_id)
+
+    connection = session.connection()
+    for parent, ids in ((Experience, experience_ids), (Education, education_ids)):
+        ids.discard(None)
+        if ids:
+            resume_ids.update(connection.execute(select(parent.resume_id).where(parent.id.in_(ids))).scalars())
+
+    resume_ids.discard(None)
+    return resume_ids
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changes(session, flush_context):
+    objects = list(session.new) + list(session.dirty) + list(session.deleted)
+
+    if objects:
+        mark_resume_changed(*_resume_ids(session, objects), session=session)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _notify_changes(session):
+    session.flush()
+    resume_ids = session.info.pop(SESSION_KEY, None)
+
+    if resume_ids:
+        notify_resume_change(session.connection(), resume_ids)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop(SESSION_KEY, None)
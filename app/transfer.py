@@ -0,0 +1,190 @@
+"""Потоковый экспорт и импорт резюме в формате JSONL (один документ на строку)."""
+import json
+import time
+from collections import Counter
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, bindparam, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.documents import SINGLE_SECTIONS, load_documents
+from app.models import User, Resume, Personal, Specialization, Experience, Job, Education, School, Contact, Upload
+from app.tracking import notify_resume_change
+
+
+# Порядок вставки соответствует внешним ключам
+INSERT_ORDER = (Resume, Personal, Specialization, Contact, Experience, Job, Education, School)
+
+
+def iter_documents(username=None, page_size=500):
+    """Отдает документы резюме постранично по возрастанию id, не держа в памяти больше одной страницы."""
+    last_id = 0
+
+    with db.engine.connect() as connection:
+        while True:
+            query = (
+                select(Resume.id, User.username)
+                .join(User, User.id == Resume.user_id)
+                .where(Resume.id > last_id)
+                .order_by(Resume.id)
+                .limit(page_size)
+            )
+            if username:
+                query = query.where(User.username == username)
+
+            resumes = connection.execute(query).all()
+            if not resumes:
+                return
+
+            documents = load_documents(connection, [resume.id for resume in resumes], all_columns=True)
+            for resume in resumes:
+                yield {'id': resume.id, 'user': resume.username, **documents[resume.id]}
+            last_id = resumes[-1].id
+
+
+def export_resumes(output, username=None, page_size=500):
+    count = 0
+
+    for document in iter_documents(username, page_size):
+        output.write(json.dumps(document, ensure_ascii=False, separators=(',', ':')) + '\n')
+        count += 1
+
+    return count
+
+
+def _coerce(model, section):
+    """Оставляет только известные колонки, кроме ключей, и превращает строки ISO-дат обратно в даты."""
+    values = {}
+
+    for name, value in section.items():
+        column = model.__table__.columns.get(name)
+        # Ключи назначаются заново; даты создания и изменения переносятся как есть
+        if column is None or name == 'id' or column.foreign_keys:
+            continue
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif value is not None and isinstance(column.type, Date):
+            value = date.fromisoformat(value)
+        values[name] = value
+
+    return values
+
+
+def _next_id(connection, model):
+    return (connection.execute(select(db.func.max(model.id))).scalar() or 0) + 1
+
+
+def _insert_batch(documents, owners):
+    """Вставляет пачку документов: по одному executemany на каждую таблицу."""
+    rows = {model: [] for model in INSERT_ORDER}
+
+    with db.engine.begin() as connection:
+        first, *rest = documents
+        # Первая вставка захватывает блокировку записи SQLite, после нее max(id) уже не изменится
+        resume_id = connection.execute(
+            Resume.__table__.insert().values(name=first['name'], user_id=owners[0])).inserted_primary_key[0]
+        resume_ids = [resume_id] + list(range(resume_id + 1, resume_id + 1 + len(rest)))
+        experience_id = _next_id(connection, Experience)
+        education_id = _next_id(connection, Education)
+
+        for index, document in enumerate(documents):
+            if index:
+                rows[Resume].append({'id': resume_ids[index], 'name': document['name'], 'user_id': owners[index]})
+
+            for key, (_, model) in SINGLE_SECTIONS.items():
+                if document.get(key):
+                    rows[model].append(dict(_coerce(model, document[key]), resume_id=resume_ids[index]))
+
+            rows[Experience].append({'id': experience_id, 'resume_id': resume_ids[index]})
+            rows[Job].extend(
+                dict(_coerce(Job, job), experience_id=experience_id) for job in document.get('jobs') or [])
+            experience_id += 1
+
+            rows[Education].append({'id': education_id, 'resume_id': resume_ids[index]})
+            rows[School].extend(
+                dict(_coerce(School, school), education_id=education_id) for school in document.get('schools') or [])
+            education_id += 1
+
+        for model in INSERT_ORDER:
+            if rows[model]:
+                connection.execute(model.__table__.insert(), rows[model])
+
+        # Импортированные резюме ссылаются на уже загруженные фото, как копии из clone_resume
+        images = Counter(row['image'] for row in rows[Personal] if row.get('image'))
+        if images:
+            uploads = Upload.__table__
+            connection.execute(
+                update(uploads).where(uploads.c.path == bindparam('image')).values(
+                    refcount=uploads.c.refcount + bindparam('count')),
+                [{'image': image, 'count': count} for image, count in images.items()],
+            )
+
+        notify_resume_change(connection, resume_ids)
+
+    # Плюс первое резюме, вставленное отдельно
+    return sum(len(batch) for batch in rows.values()) + 1
+
+
+def import_resumes(lines, batch_size=1000, username=None, progress=None):
+    """Импортирует документы из итератора строк JSONL пачками по batch_size.
+
+    Владелец резюме берется из поля "user" документа или из username, если он задан.
+    Документы с неизвестным пользователем и документы, нарушающие ограничения базы (например,
+    с уже занятыми контактами), пропускаются; для последних в stats['errors'] попадают
+    номер строки и текст ошибки. Возвращает словарь со статистикой.
+    """
+    users = {}
+    stats = {'resumes': 0, 'rows': 0, 'skipped': 0, 'errors': []}
+    started = time.perf_counter()
+    batch, owners, numbers = [], [], []
+
+    def owner_id(name):
+        if name not in users:
+            users[name] = db.session.query(User.id).filter_by(username=name).scalar()
+        return users[name]
+
+    def flush():
+        try:
+            stats['rows'] += _insert_batch(batch, owners)
+            stats['resumes'] += len(batch)
+        except IntegrityError:
+            # Пачка откатилась целиком: повторяем ее по одному документу, чтобы пропустить только конфликтующие
+            for line_number, document, owner in zip(numbers, batch, owners):
+                try:
+                    stats['rows'] += _insert_batch([document], [owner])
+                    stats['resumes'] += 1
+                except IntegrityError as error:
+                    stats['skipped'] += 1
+                    stats['errors'].append((line_number, str(error.orig)))
+        stats['seconds'] = time.perf_counter() - started
+        if progress:
+            progress(stats)
+        batch.clear()
+        owners.clear()
+        numbers.clear()
+
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+
+        document = json.loads(line)
+        user_id = owner_id(username or document.get('user'))
+
+        if user_id is None:
+            stats['skipped'] += 1
+            continue
+
+        batch.append(document)
+        owners.append(user_id)
+        numbers.append(line_number)
+
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+
+    stats['seconds'] = time.perf_counter() - started
+
+    return stats
@@ -0,0 +1,91 @@
+"""Потоковый прием загружаемых файлов.
+
+Werkzeug по умолчанию держит файл до 500 КБ в памяти, а проверка расширения
+в view выполняется уже после того, как все тело запроса прочитано. Здесь файл
+пишется кусками во временный файл на диске, тип определяется по сигнатуре
+в первых байтах, а слишком большой или не являющийся картинкой файл обрывает
+разбор запроса сразу, не дочитывая тело.
+"""
+import tempfile
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+
+# Сигнатура в начале файла -> расширение
+SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'\xff\xd8\xff': 'jpg',
+    b'GIF87a': 'gif',
+    b'GIF89a': 'gif',
+}
+SIGNATURE_LENGTH = max(map(len, SIGNATURES))
+
+
+def image_type(header):
+    """Возвращает расширение картинки по первым байтам файла или None, если формат не поддерживается."""
+    for signature, extension in SIGNATURES.items():
+        if header.startswith(signature):
+            return extension
+
+    return None
+
+
+class GuardedFile:
+    """Временный файл, который считает записанные байты и проверяет сигнатуру по первым из них."""
+
+    def __init__(self, limit):
+        self.file = tempfile.TemporaryFile('w+b')
+        self.limit = limit
+        self.size = 0
+        self.header = b''
+        self.checked = False
+
+    def _check(self):
+        self.checked = True
+        if image_type(self.header) is None:
+            self.file.close()
+            raise UnsupportedMediaType('Файл не является изображением PNG, JPEG или GIF.')
+
+    def write(self, data):
+        self.size += len(data)
+
+        if self.limit is not None and self.size > self.limit:
+            self.file.close()
+            raise RequestEntityTooLarge()
+
+        if not self.checked:
+            self.header += data[:SIGNATURE_LENGTH - len(self.header)]
+            if len(self.header) == SIGNATURE_LENGTH:
+                self._check()
+
+        return self.file.write(data)
+
+    def seek(self, *args):
+        # Парсер перематывает файл, когда часть запроса дочитана: здесь проверяются файлы короче сигнатуры,
+        # в том числе пустые - у них сигнатуры нет вовсе
+        if not self.checked:
+            self._check()
+
+        return self.file.seek(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def __iter__(self):
+        return iter(self.file)
+
+
+class UploadRequest(Request):
+    """Запрос, у которого файлы из multipart-формы пишутся на диск через GuardedFile."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not filename:
+            # Пустое поле <input type="file">: ничего не проверяем
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        return GuardedFile(current_app.config['MAX_UPLOAD_SIZE'])
+
+
+def init_app(app):
+    app.request_class = UploadRequest
@@ -1,68 +1,137 @@
-import os
-from urllib.parse import urlsplit
+from flask import Blueprint, abort, current_app, make_response, render_template, redirect, url_for, request
+from flask_login import current_user, login_required
+from flask_wtf import FlaskForm
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import cloning, db
+from app.cache import render_fragment, invalidate_fragment
+from app.conditional import conditional_resume
+from app.database import retry_on_busy
+from app.documents import form_fields
+from app.models import Resume, Personal, Specialization, Contact
+from app.images import schedule_variants, available_variants, variants_ready
+from app.queries import load_resume_graph, resume_index_page
+from app.storage import save_upload, release_upload, release_uploads
+from app.tracking import mark_resume_changed
+from app.utils import is_allowed_file
+from .forms import PersonalForm, ResumeForm, SpecializationForm, ContactForm
+
+
+bp = Blueprint('resumes', __name__)
+
+
+SELECTORS = {
+    'gender': {'male': 'мужской', 'female': 'женский'},
+    'readiness': {
+        'not_looking': 'не ищу работу',
+        'looking': 'ищу работу',
+        'consider': 'рассмотрю предложения',
+    },
+    'specialization': {
+        'development': 'разработка',
+        'testing': 'тестирование',
+        'analytics': 'аналитика',
+        'design': 'дизайн',
+        'management': 'менеджмент',
+        'security': 'информационная безопасность',
+        'ai': 'искусственный интеллект',
+    },
+    'grade': {
+        'no': 'не указана',
+        'intern': 'стажёр',
+        'junior': 'младший',
+        'middle': 'средний',
+        'senior': 'старший',
+        'lead': 'ведущий',
+    },
+    'yes_no': {True: 'да', False: 'нет'},
+}
+
+
+def render_resume_sections(resume):
+    """Рендерит карточки резюме, беря неизмененные разделы из кэша фрагментов."""
+    sections = {}
+
+    for section in ('personal', 'specialization', 'contact'):
+        row = getattr(resume, section)
+        version = row.updated_on if row else None
+
+        if section == 'personal' and row:
+            # Уменьшенные копии фото появляются позже, после этого фрагмент нужно перерисовать
+            version = (version, available_variants(row.image))
+
+        sections[section] = render_fragment(
+            section,
+            row.id if row else None,
+            version,
+            f'sections/{section}.html',
+            data=row,
+            selectors=SELECTORS,
+        )
+
+    experience = resume.experience
+    jobs = experience.jobs if experience else []
+    sections['jobs'] = render_fragment(
+        'jobs',
+        experience.id if experience else None,
+        tuple((job.id, job.updated_on) for job in jobs),
+        'sections/jobs.html',
+        jobs=jobs,
+        selectors=SELECTORS,
+    )
 
-from flask import render_template, redirect, url_for, flash, request
-from flask_login import current_user, login_user, logout_user, login_required
-from werkzeug.utils import secure_filename
+    education = resume.education
+    schools = education.schools if education else []
+    sections['schools'] = render_fragment(
+        'schools',
+        education.id if education else None,
+        tuple((school.id, school.updated_on) for school in schools),
+        'sections/schools.html',
+        schools=schools,
+        selectors=SELECTORS,
+    )
 
-from app import app, db, login_manager
-from app.models import (
-    User, Resume, Personal, Specialization, Experience, Job, Education, School, Contact)
-from app.utils import is_allowed_file
-from .forms import (
-    PersonalForm, LoginForm, ResumeForm, SpecializationForm, ContactForm, JobForm, SchoolForm)
+    return sections
 
 
-@app.before_first_request
-def create_tables():
-    db.create_all()
+def find_section(model, resume_id):
+    return db.session.query(model).filter_by(resume_id=resume_id).first()
 
 
-@login_manager.user_loader
-def load_user(id):
-  return db.session.get(User, int(id))
+def insert_section(model, resume_id, **values):
+    """Создает раздел резюме, если его еще нет. Возвращает True, если строка вставлена.
 
+    INSERT ... ON CONFLICT DO NOTHING по уникальному resume_id не создает дубль
+    при повторной отправке формы или одновременных запросах.
+    """
+    result = db.session.execute(
+        sqlite_insert(model.__table__)
+        .values(resume_id=resume_id, **values)
+        .on_conflict_do_nothing(index_elements=['resume_id'])
+    )
 
-@app.route('/login/', methods=['GET', 'POST'])
-def login():
-    if current_user.is_authenticated:
-        return redirect(url_for('index'))
+    if result.rowcount != 1:
+        return False
 
-    form = LoginForm()
-    if form.validate_on_submit():
-        user = db.session.query(User).filter_by(username=form.username.data).first()
-
-        if user:
-            if user.password == form.password.data:
-                login_user(user, remember=form.username)
-                # Перенаправление на страницу "next"
-                next_page = request.args.get('next')
-                if not next_page or urlsplit(next_page).netloc != '':
-                    next_page = url_for('index')
-
-                return redirect(next_page)
-            else:
-                flash('Неверный пароль. Попробуйте снова.', 'alert-danger')
-        else:
-            user = User(username=form.username.data, password=form.password.data)
-            db.session.add(user)
-            db.session.commit()
+    mark_resume_changed(resume_id)
+    return True
 
-            login_user(user, remember=form.username)
 
-            return redirect(url_for('index'))
+def ensure_section(model, resume_id):
+    """Возвращает раздел резюме, создавая его, если его еще нет."""
+    insert_section(model, resume_id)
 
-    return render_template('login.html', form=form)
+    return find_section(model, resume_id)
 
 
-@app.route('/logout/')
-def logout():
-    logout_user()
-    return redirect(url_for('login'))
+def section_values(form):
+    return {name: form[name].data for name in form_fields(type(form))}
 
 
-@app.route('/', methods=['GET', 'POST'])
+@bp.route('/', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def index():
     form = ResumeForm()
 
@@ -70,93 +139,118 @@ def index():
         db.session.add(Resume(name=form.name.data, user_id=current_user.get_id()))
         db.session.commit()
 
-    resumes = db.session.query(Resume).filter_by(user_id=current_user.get_id()).all()
+    resumes, next_cursor, prev_cursor = resume_index_page(
+        current_user.get_id(),
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=current_app.config['INDEX_PAGE_SIZE'],
+    )
 
-    return render_template('index.html', resumes=resumes, form=form)
+    return render_template(
+        'index.html', resumes=resumes, next_cursor=next_cursor, prev_cursor=prev_cursor, form=form)
 
 
-@app.route('/list_resume/<int:resume_id>/')
+@bp.route('/list_resume/<int:resume_id>/')
 @login_required
+@conditional_resume
 def list_resume(resume_id):
-    resume = db.session.query(Resume).filter_by(id=resume_id).first()
-    selectors = {
-        'gender': {'male': 'мужской', 'female': 'женский'},
-        'readiness': {
-            'not_looking': 'не ищу работу',
-            'looking': 'ищу работу',
-            'consider': 'рассмотрю предложения',
-        },
-        'specialization': {
-            'development': 'разработка',
-            'testing': 'тестирование',
-            'analytics': 'аналитика',
-            'design': 'дизайн',
-            'management': 'менеджмент',
-            'security': 'информационная безопасность',
-            'ai': 'искусственный интеллект',
-        },
-        'grade': {
-            'no': 'не указана',
-            'intern': 'стажёр',
-            'junior': 'младший',
-            'middle': 'средний',
-            'senior': 'старший',
-            'lead': 'ведущий',
-        },
-        'yes_no': {True: 'да', False: 'нет'},
-    }
-
-    return render_template('list_resume.html', resume_id=resume_id, resume=resume, selectors=selectors)
-
-
-@app.route('/edit_resume/<int:resume_id>/', methods=['GET', 'POST'])
+    resume = load_resume_graph(resume_id)
+    if resume is None:
+        abort(404)
+
+    sections = render_resume_sections(resume)
+    response = make_response(
+        render_template('list_resume.html', resume_id=resume_id, resume=resume, sections=sections))
+
+    if resume.personal and not variants_ready(resume.personal.image):
+        # Уменьшенные копии фото появятся без изменения резюме: такую страницу не кэшируем
+        response.cache_control.no_store = True
+
+    return response
+
+
+@bp.route('/edit_resume/<int:resume_id>/', methods=['GET', 'POST'])
 @login_required
 def edit_resume(resume_id):
-    personal = db.session.query(Personal).filter_by(resume_id=resume_id).first()
+    personal = find_section(Personal, resume_id)
 
     if not personal:
-        return redirect(url_for('create_personal', resume_id=resume_id))
+        return redirect(url_for('resumes.create_personal', resume_id=resume_id))
 
-    return redirect(url_for('edit_personal', resume_id=resume_id))
+    return redirect(url_for('resumes.edit_personal', resume_id=resume_id))
 
 
-@app.route('/delete_resume/<int:resume_id>/', methods=['GET', 'POST'])
+@bp.route('/clone_resume/<int:resume_id>/', methods=['POST'])
 @login_required
+@retry_on_busy
+def clone_resume(resume_id):
+    # Форма без полей: проверяется только CSRF-токен
+    if not FlaskForm().validate_on_submit():
+        abort(400)
+
+    if cloning.clone_resume(resume_id, current_user.get_id()) is None:
+        abort(404)
+    db.session.commit()
+
+    return redirect(url_for('resumes.index'))
+
+
+@bp.route('/delete_resume/<int:resume_id>/', methods=['GET', 'POST'])
+@login_required
+@retry_on_busy
 def delete_resume(resume_id):
-    resume = Resume.query.filter_by(user_id=current_user.get_id(), id=resume_id).first()
-    db.session.delete(resume)
+    # Разделы, места работы и учебы удаляет ON DELETE CASCADE в базе, без загрузки в сессию.
+    # Фрагменты в кэше не сбрасываются: их версия больше не совпадет ни с одной строкой.
+    # Счетчик ссылок на фото уменьшается до удаления, файл потом удалит фоновая очистка.
+    owned = (Resume.id == resume_id, Resume.user_id == current_user.get_id())
+    release_uploads(select(Personal.image).join(Resume).where(*owned))
+
+    if not db.session.execute(delete(Resume.__table__).where(*owned)).rowcount:
+        abort(404)
+    mark_resume_changed(resume_id)
     db.session.commit()
 
-    return redirect(url_for('index'))
+    return redirect(url_for('resumes.index'))
 
 
-@app.route('/resumes/<int:resume_id>/create_personal/', methods=['GET', 'POST'])
+@bp.route('/resumes/<int:resume_id>/create_personal/', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def create_personal(resume_id):
-    personal = Personal(resume_id=resume_id)
-    db.session.add(personal)
-    form = PersonalForm(request.form, obj=personal)
+    if find_section(Personal, resume_id):
+        return redirect(url_for('resumes.edit_personal', resume_id=resume_id))
+
+    form = PersonalForm(request.form)
 
     if form.validate_on_submit():
-        form.populate_obj(personal)
-        file = request.files['image']
+        # Повторная отправка формы не создает второй раздел: она просто ведет к редактированию
+        if insert_section(Personal, resume_id, **section_values(form)):
+            file = request.files['image']
+            image = None
 
-        if file and is_allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-            personal.image = filename
+            if file and is_allowed_file(file.filename):
+                image = save_upload(file)
+                db.session.execute(
+                    update(Personal.__table__).where(Personal.resume_id == resume_id).values(image=image))
 
-        db.session.commit()
+            db.session.commit()
+            schedule_variants(image)
 
-        return redirect(url_for('edit_personal', resume_id=resume_id))
+        return redirect(url_for('resumes.edit_personal', resume_id=resume_id))
 
     return render_template('personal.html', resume_id=resume_id, form=form)
 
 
-@app.route('/resumes/<int:resume_id>/edit_personal/', methods=['GET', 'POST'])
+@bp.route('/resumes/<int:resume_id>/edit_personal/', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
+@conditional_resume
 def edit_personal(resume_id):
-    personal = db.session.query(Personal).filter_by(resume_id=resume_id).first()
+    personal = find_section(Personal, resume_id)
+
+    if not personal:
+        return redirect(url_for('resumes.create_personal', resume_id=resume_id))
+
     form = PersonalForm(request.form, obj=personal)
 
     if form.validate_on_submit():
@@ -165,61 +259,75 @@ def edit_personal(resume_id):
         file = request.files['image']
 
         if file and is_allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            release_upload(filename)
+            filename = save_upload(file)
 
         personal.image = filename
 
         db.session.commit()
+        invalidate_fragment('personal', personal.id)
 
-        return redirect(url_for('edit_personal', resume_id=resume_id))
+        if file and is_allowed_file(file.filename):
+            schedule_variants(filename)
 
-    return render_template(
+        return redirect(url_for('resumes.edit_personal', resume_id=resume_id))
+
+    response = make_response(render_template(
         'personal.html',
         resume_id=resume_id,
         active_page='personal',
-        image=personal.image if personal else None,
+        image=personal.image,
         form=form,
-    )
+    ))
+
+    if not variants_ready(personal.image):
+        response.cache_control.no_store = True
+
+    return response
 
 
 
-# @app.route('/specialization/')
+# @bp.route('/specialization/')
 # @login_required
 # def specialization():
 #     return render_template('specialization.html', active_page='specialization')
 
-@app.route('/resumes/<int:resume_id>/create_specialization/', methods=['GET', 'POST'])
+@bp.route('/resumes/<int:resume_id>/create_specialization/', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def create_specialization(resume_id):
-    specialization = Specialization(resume_id=resume_id)
-    db.session.add(specialization)
-    form = SpecializationForm(request.form, obj=specialization)
+    if find_section(Specialization, resume_id):
+        return redirect(url_for('resumes.edit_specialization', resume_id=resume_id))
+
+    form = SpecializationForm(request.form)
 
     if form.validate_on_submit():
-        form.populate_obj(specialization)
+        insert_section(Specialization, resume_id, **section_values(form))
         db.session.commit()
 
-        return redirect(url_for('edit_specialization', resume_id=resume_id))
+        return redirect(url_for('resumes.edit_specialization', resume_id=resume_id))
 
     return render_template('specialization.html', resume_id=resume_id, form=form)
 
 
-@app.route('/resumes/<int:resume_id>/edit_specialization/', methods=['GET', 'POST'])
+@bp.route('/resumes/<int:resume_id>/edit_specialization/', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
+@conditional_resume
 def edit_specialization(resume_id):
-    specialization = db.session.query(Specialization).filter_by(resume_id=resume_id).first()
+    specialization = find_section(Specialization, resume_id)
 
     if not specialization:
-        return redirect(url_for('create_specialization', resume_id=resume_id))
+        return redirect(url_for('resumes.create_specialization', resume_id=resume_id))
 
     form = SpecializationForm(request.form, obj=specialization)
 
     if form.validate_on_submit():
         form.populate_obj(specialization)
         db.session.commit()
+        invalidate_fragment('specialization', specialization.id)
 
-        return redirect(url_for('edit_specialization', resume_id=resume_id))
+        return redirect(url_for('resumes.edit_specialization', resume_id=resume_id))
 
     return render_template(
         'specialization.html',
@@ -228,204 +336,47 @@ def edit_specialization(resume_id):
         form=form,
     )
 
-
-# @app.route('/experience/')
-# @login_required
-# def experience():
-#     return render_template('experience.html', active_page='experience')
-
-@app.route('/resumes/<int:resume_id>/create_experience/', methods=['GET', 'POST'])
-@login_required
-def create_experience(resume_id):
-    experience = Experience(resume_id=resume_id)
-    db.session.add(experience)
-    db.session.commit()
-
-    return redirect(url_for('edit_experience', resume_id=resume_id))
-
-
-@app.route('/resumes/<int:resume_id>/edit_experience/', methods=['GET', 'POST'])
-@login_required
-def edit_experience(resume_id):
-    experience = db.session.query(Experience).filter_by(resume_id=resume_id).first()
-
-    if not experience:
-        return redirect(url_for('create_experience', resume_id=resume_id))
-
-    return render_template(
-        'experience.html',
-        resume_id=resume_id,
-        experience_id=experience.id,
-        jobs=[{'id': job.id, 'name': job.name} for job in experience.jobs],
-        active_page='experience',
-    )
-
-
-@app.route('/resumes/<int:resume_id>/edit_experience/<int:experience_id>/create_job/', methods=['GET', 'POST'])
-@login_required
-def create_job(resume_id, experience_id):
-    job = Job(experience_id=experience_id)
-    db.session.add(job)
-    form = JobForm(request.form, obj=job)
-
-    if form.validate_on_submit():
-        form.populate_obj(job)
-        db.session.commit()
-
-        return redirect(url_for('edit_experience', resume_id=resume_id, experience_id=experience_id, job_id=job.id))
-
-    return render_template('job.html', resume_id=resume_id, form=form)
-
-@app.route('/resumes/<int:resume_id>/edit_experience/<int:experience_id>/edit_job/<int:job_id>/', methods=['GET', 'POST'])
-@login_required
-def edit_job(resume_id, experience_id, job_id):
-    job = db.session.query(Job).filter_by(id=job_id).first()
-
-    form = JobForm(request.form, obj=job)
-
-    if form.validate_on_submit():
-        form.populate_obj(job)
-        db.session.commit()
-
-        return redirect(url_for('edit_experience', resume_id=resume_id))
-
-    return render_template(
-        'job.html',
-        resume_id=resume_id,
-        experience_id=experience_id,
-        job_id=job.id,
-        active_page='experience',
-        form=form,
-    )
-
-
-@app.route('/resumes/<int:resume_id>/edit_experience/<int:experience_id>/delete_job/<int:job_id>/', methods=['GET', 'POST'])
-@login_required
-def delete_job(resume_id, experience_id, job_id):
-    job = Job.query.filter_by(id=job_id).first()
-    db.session.delete(job)
-    db.session.commit()
-
-    return redirect(url_for('edit_experience', resume_id=resume_id))
-
-
-# @app.route('/education/')
-# @login_required
-# def education():
-#     return render_template('education.html', active_page='education')
-
-@app.route('/resumes/<int:resume_id>/create_education/', methods=['GET', 'POST'])
-@login_required
-def create_education(resume_id):
-    education = Education(resume_id=resume_id)
-    db.session.add(education)
-    db.session.commit()
-
-    return redirect(url_for('edit_education', resume_id=resume_id))
-
-
-@app.route('/resumes/<int:resume_id>/edit_education/', methods=['GET', 'POST'])
-@login_required
-def edit_education(resume_id):
-    education = db.session.query(Education).filter_by(resume_id=resume_id).first()
-
-    if not education:
-        return redirect(url_for('create_education', resume_id=resume_id))
-
-    return render_template(
-        'education.html',
-        resume_id=resume_id,
-        education_id=education.id,
-        schools=[{'id': school.id, 'name': school.name} for school in education.schools],
-        active_page='education',
-    )
-
-
-@app.route('/resumes/<int:resume_id>/edit_education/<int:education_id>/create_school/', methods=['GET', 'POST'])
-@login_required
-def create_school(resume_id, education_id):
-    school = School(education_id=education_id)
-    db.session.add(school)
-    form = SchoolForm(request.form, obj=school)
-
-    if form.validate_on_submit():
-        form.populate_obj(school)
-        db.session.commit()
-
-        return redirect(url_for('edit_education', resume_id=resume_id, education_id=education_id, school_id=school.id))
-
-    return render_template('school.html', resume_id=resume_id, form=form)
-
-
-@app.route('/resumes/<int:resume_id>/edit_education/<int:education_id>/edit_school/<int:school_id>/', methods=['GET', 'POST'])
-@login_required
-def edit_school(resume_id, education_id, school_id):
-    school = db.session.query(School).filter_by(id=school_id).first()
-
-    form = SchoolForm(request.form, obj=school)
-
-    if form.validate_on_submit():
-        form.populate_obj(school)
-        db.session.commit()
-
-        return redirect(url_for('edit_education', resume_id=resume_id))
-
-    return render_template(
-        'school.html',
-        resume_id=resume_id,
-        education_id=education_id,
-        school_id=school.id,
-        active_page='education',
-        form=form,
-    )
-
-
-@app.route('/resumes/<int:resume_id>/edit_experience/<int:education_id>/delete_school/<int:school_id>/', methods=['GET', 'POST'])
-@login_required
-def delete_school(resume_id, education_id, school_id):
-    school = School.query.filter_by(id=school_id).first()
-    db.session.delete(school)
-    db.session.commit()
-
-    return redirect(url_for('edit_education', resume_id=resume_id))
-
-
-# @app.route('/contact/')
+# @bp.route('/contact/')
 # @login_required
 # def contact():
 #     return render_template('contact.html', active_page='contact')
 
-@app.route('/resumes/<int:resume_id>/create_contact/', methods=['GET', 'POST'])
+@bp.route('/resumes/<int:resume_id>/create_contact/', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
 def create_contact(resume_id):
-    contact = Contact(resume_id=resume_id)
-    db.session.add(contact)
-    form = ContactForm(request.form, obj=contact)
+    if find_section(Contact, resume_id):
+        return redirect(url_for('resumes.edit_contact', resume_id=resume_id))
+
+    form = ContactForm(request.form)
 
     if form.validate_on_submit():
-        form.populate_obj(contact)
+        insert_section(Contact, resume_id, **section_values(form))
         db.session.commit()
 
-        return redirect(url_for('edit_contact', resume_id=resume_id))
+        return redirect(url_for('resumes.edit_contact', resume_id=resume_id))
 
     return render_template('contact.html', resume_id=resume_id, form=form)
 
 
-@app.route('/resumes/<int:resume_id>/edit_contact/', methods=['GET', 'POST'])
+@bp.route('/resumes/<int:resume_id>/edit_contact/', methods=['GET', 'POST'])
 @login_required
+@retry_on_busy
+@conditional_resume
 def edit_contact(resume_id):
-    contact = db.session.query(Contact).filter_by(resume_id=resume_id).first()
+    contact = find_section(Contact, resume_id)
 
     if not contact:
-        return redirect(url_for('create_contact', resume_id=resume_id))
+        return redirect(url_for('resumes.create_contact', resume_id=resume_id))
 
     form = ContactForm(request.form, obj=contact)
 
     if form.validate_on_submit():
         form.populate_obj(contact)
         db.session.commit()
+        invalidate_fragment('contact', contact.id)
 
-        return redirect(url_for('edit_contact', resume_id=resume_id))
+        return redirect(url_for('resumes.edit_contact', resume_id=resume_id))
 
     return render_template(
         'contact.html',
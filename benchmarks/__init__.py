@@ -0,0 +1,6 @@
+"""Нагрузочные тесты приложения.
+
+python -m benchmarks - прогон всех маршрутов на синтетической базе с отчетом
+о задержках, пропускной способности и числе SQL-запросов на запрос.
+Остальные модули пакета - отдельные узконаправленные замеры.
+"""
@@ -0,0 +1,61 @@
+"""Нагрузочный прогон всех маршрутов приложения на синтетической базе.
+
+Запуск: python -m benchmarks [--users 10] [--resumes 20] [--requests 200] [--mode client|http] [--threads 4]
+                             [--output report.json] [--baseline baseline.json] [--tolerance 0.2]
+
+Отчет сохраняется в JSON; при указании --baseline прогон завершается с кодом 1,
+если p95 какого-либо маршрута вырос больше допуска или выросло число SQL-запросов.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Задержки и пропускная способность маршрутов')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--resumes', type=int, default=20, help='резюме на пользователя')
+    parser.add_argument('--jobs', type=int, default=5, help='мест работы в резюме')
+    parser.add_argument('--schools', type=int, default=2, help='мест учебы в резюме')
+    parser.add_argument('--requests', type=int, default=200, help='запросов на маршрут')
+    parser.add_argument('--mode', choices=('client', 'http'), default='client')
+    parser.add_argument('--threads', type=int, default=4, help='одновременных пользователей в режиме http')
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='resume_bench_')
+    os.environ['DEVELOPMENT_DATABASE_URI'] = 'sqlite:///' + os.path.join(folder, 'bench.db')
+
+    from app import create_app, migrations
+    from benchmarks import report, routes
+    from benchmarks.seed import seed_database
+
+    app = create_app()
+    with app.app_context():
+        migrations.upgrade()
+        fixtures = seed_database(args.users, args.resumes, args.jobs, args.schools)
+
+    threads = min(args.threads, args.users) if args.mode == 'http' else 1
+    results = routes.run(app, fixtures, args.requests, threads=threads, http=args.mode == 'http')
+    summary = report.summarize(results)
+    report.print_summary(summary)
+
+    meta = {
+        'mode': args.mode, 'threads': threads, 'users': args.users, 'resumes': args.resumes,
+        'jobs': args.jobs, 'schools': args.schools, 'requests': args.requests,
+    }
+    report.write_report(args.output, meta, summary)
+
+    if args.baseline:
+        regressions = report.compare(summary, args.baseline, args.tolerance)
+        for line in regressions:
+            print('Регрессия:', line)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Число SQL-запросов и время копирования резюме в зависимости от числа мест работы.
+
+Копирование делается запросами INSERT ... SELECT, поэтому число запросов не должно расти вместе с резюме.
+Запуск: python -m benchmarks.clone_resume [--jobs 1,10,100]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('DEVELOPMENT_DATABASE_URI', 'sqlite://')
+
+from sqlalchemy import func, select
+
+from app import create_app, db, migrations
+from app.cloning import clone_resume
+from app.models import Resume, Experience, Job
+from benchmarks.routes import StatementCounter
+from benchmarks.seed import seed_database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', default='1,10,100')
+    args = parser.parse_args()
+
+    print(f'{"мест работы":>12} {"запросов":>10} {"мс":>8}')
+    for jobs in (int(value) for value in args.jobs.split(',')):
+        # Для каждого размера - новое приложение и своя база в памяти
+        app = create_app()
+        counter = StatementCounter()
+        counter.install(app)
+
+        with app.app_context():
+            migrations.upgrade()
+            seed_database(users=1, resumes_per_user=1, jobs_per_experience=jobs, schools_per_education=3)
+            resume = db.session.query(Resume).first()
+
+            counter.count = 0
+            started = time.perf_counter()
+            new_id = clone_resume(resume.id, resume.user_id)
+            db.session.commit()
+            elapsed = time.perf_counter() - started
+            statements = counter.count
+
+            copied = db.session.execute(
+                select(func.count(Job.id)).join(Experience).where(Experience.resume_id == new_id)).scalar()
+
+        if copied != jobs:
+            raise SystemExit(f'скопировано {copied} мест работы из {jobs}')
+        print(f'{jobs:>12} {statements:>10} {elapsed * 1000:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Время до первого ответа нового процесса приложения.
+
+Сравнивает запуск без кэша байткода шаблонов, с заранее скомпилированным кэшем
+(runner.py compile-templates) и с кэшем плюс загрузкой шаблонов при старте (TEMPLATE_WARMUP).
+Время отсчитывается от запуска интерпретатора, так что включает импорт приложения.
+
+Запуск: python -m benchmarks.cold_start [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# Дочерние процессы запускаются из корня репозитория, откуда бы ни был запущен сам замер
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNNER = os.path.join(ROOT, 'runner.py')
+
+# (режим, компилировать шаблоны заранее, загружать шаблоны при старте)
+MODES = (
+    ('cold', False, '0'),
+    ('bytecode', True, '0'),
+    ('bytecode+warmup', True, '1'),
+)
+
+
+def measure(started):
+    from app import create_app, migrations
+    from benchmarks.routes import CSRF_PATTERN, ClientSession
+
+    app = create_app()
+    with app.app_context():
+        migrations.upgrade()
+    imported = time.time()
+
+    # Первые рендеры страницы входа и списка резюме; вход под новым именем создает пользователя
+    session = ClientSession(app)
+    _, body = session.request('GET', '/login/')
+    login_page = time.time()
+    token = CSRF_PATTERN.search(body).group(1)
+    session.request('POST', '/login/', {'username': 'bench', 'password': 'bench', 'csrf_token': token})
+    index_started = time.time()
+    session.request('GET', '/')
+    index_page = time.time()
+
+    print(imported - started, login_page - started, (login_page - imported) * 1000, (index_page - index_started) * 1000)
+
+
+def run(compiled, warmup, folder):
+    env = dict(
+        os.environ,
+        TEMPLATE_CACHE_FOLDER=folder,
+        TEMPLATE_WARMUP=warmup,
+        DEVELOPMENT_DATABASE_URI='sqlite:///' + os.path.join(folder, 'bench.db'),
+    )
+    if compiled:
+        subprocess.run(
+            [sys.executable, RUNNER, 'compile-templates'], cwd=ROOT, env=env, check=True, capture_output=True)
+
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.cold_start', '--measure', str(time.time())],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout.split()
+
+    return [float(value) for value in output[-4:]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--measure', type=float)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure)
+        return
+
+    print(f'{"режим":<16} {"импорт, с":>10} {"до 1-го ответа, с":>18} {"/login/, мс":>12} {"/, мс":>8}')
+    for mode, compiled, warmup in MODES:
+        samples = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as folder:
+                samples.append(run(compiled, warmup, folder))
+
+        medians = [statistics.median(column) for column in zip(*samples)]
+        print(f'{mode:<16} {medians[0]:>10.3f} {medians[1]:>18.3f} {medians[2]:>12.1f} {medians[3]:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
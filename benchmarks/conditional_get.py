@@ -0,0 +1,73 @@
+"""Стоимость повторного просмотра страниц резюме с If-None-Match.
+
+Для каждой страницы сравниваются первый ответ 200 и повторный запрос с полученным ETag:
+число SQL-запросов и время. После изменения места работы ETag всех страниц резюме должен смениться.
+Запуск: python -m benchmarks.conditional_get [--requests 200]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('DEVELOPMENT_DATABASE_URI', 'sqlite://')
+
+from app import create_app, db, migrations
+from app.models import Job
+from benchmarks.routes import SCENARIOS, StatementCounter, ClientSession, login
+from benchmarks.seed import seed_database
+
+
+PAGES = ('list_resume', 'edit_personal', 'edit_specialization', 'edit_experience', 'edit_job', 'edit_education',
+         'edit_school', 'edit_contact')
+
+
+def measure(client, counter, path, headers, requests):
+    counter.count = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+    elapsed = time.perf_counter() - started
+
+    return response, counter.count / requests, elapsed / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        migrations.upgrade()
+        fixtures = seed_database(users=1, resumes_per_user=1, jobs_per_experience=3, schools_per_education=2)
+
+    resume = fixtures['bench0'][0]
+    counter = StatementCounter()
+    counter.install(app)
+    session = ClientSession(app)
+    login(session, 'bench0')
+    client = session.client
+    paths = {name: path(resume) for name, method, path, _ in SCENARIOS if name in PAGES}
+    etags = {}
+
+    print(f'{"страница":<20} {"запросов 200":>13} {"мс 200":>8} {"запросов 304":>13} {"мс 304":>8}')
+    for name in PAGES:
+        response, full_statements, full_ms = measure(client, counter, paths[name], {}, args.requests)
+        etags[name] = response.headers['ETag']
+        response, statements, ms = measure(client, counter, paths[name], {'If-None-Match': etags[name]}, args.requests)
+        if response.status_code != 304:
+            raise SystemExit(f'{name}: ожидался ответ 304, получен {response.status_code}')
+        print(f'{name:<20} {full_statements:>13.1f} {full_ms:>8.2f} {statements:>13.1f} {ms:>8.2f}')
+
+    with app.app_context():
+        job = db.session.get(Job, resume['job_ids'][0])
+        job.position = 'Архитектор'
+        db.session.commit()
+
+    stale = [name for name in PAGES if client.get(paths[name], headers={'If-None-Match': etags[name]}).status_code == 304]
+    if stale:
+        raise SystemExit(f'После изменения места работы остались прежние ETag: {", ".join(stale)}')
+    print('После изменения места работы все страницы отдаются заново')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Число SQL-запросов и время удаления резюме в зависимости от числа мест работы и учебы.
+
+Разделы удаляет ON DELETE CASCADE в базе, поэтому число запросов не должно зависеть от размера резюме.
+Запуск: python -m benchmarks.delete_resume [--jobs 1,10,100]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('DEVELOPMENT_DATABASE_URI', 'sqlite://')
+
+from sqlalchemy import func, select
+
+from app import create_app, db, migrations
+from app.models import Job, School
+from benchmarks.routes import ClientSession, StatementCounter, login
+from benchmarks.seed import seed_database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', default='1,10,100')
+    args = parser.parse_args()
+
+    print(f'{"мест работы":>12} {"запросов":>10} {"мс":>8}')
+    for jobs in (int(value) for value in args.jobs.split(',')):
+        # Для каждого размера - новое приложение и своя база в памяти
+        app = create_app()
+        app.config['UPLOAD_GC_INTERVAL'] = 0
+        with app.app_context():
+            migrations.upgrade()
+            fixtures = seed_database(users=1, resumes_per_user=1, jobs_per_experience=jobs, schools_per_education=jobs)
+
+        counter = StatementCounter()
+        counter.install(app)
+        session = ClientSession(app)
+        login(session, 'bench0')
+
+        counter.count = 0
+        started = time.perf_counter()
+        status, _ = session.request('GET', f"/delete_resume/{fixtures['bench0'][0]['resume_id']}/")
+        elapsed = time.perf_counter() - started
+        statements = counter.count
+
+        with app.app_context():
+            left = sum(db.session.execute(select(func.count(model.id))).scalar() for model in (Job, School))
+
+        if status != 302 or left:
+            raise SystemExit(f'резюме не удалено: ответ {status}, осталось мест работы и учебы: {left}')
+        print(f'{jobs:>12} {statements:>10} {elapsed * 1000:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Стоимость создания и рендеринга форм разделов и проверка, что она не растет со временем.
+
+Каждая форма создается и рендерится много раз подряд партиями; размер HTML должен совпадать,
+а занятая память во второй половине партий, после прогрева внутренних кэшей WTForms,
+расти не больше чем на MEMORY_GROWTH_LIMIT байт на форму.
+Запуск: python -m benchmarks.forms [--iterations 5000] [--batches 10]
+"""
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault('DEVELOPMENT_DATABASE_URI', 'sqlite://')
+
+from app import create_app
+from app.forms import ContactForm, JobForm, PersonalForm, SchoolForm, SpecializationForm
+
+
+FORMS = (PersonalForm, SpecializationForm, JobForm, SchoolForm, ContactForm)
+# Утечка хотя бы одного объекта формы на экземпляр - сотни байт, прогрев кэшей - доли байта
+MEMORY_GROWTH_LIMIT = 8
+
+
+def render(form_class):
+    form = form_class()
+    return sum(len(str(field)) for field in form)
+
+
+def measure(form_class, iterations, batches):
+    first = render(form_class)
+    per_batch = max(iterations // batches, 1)
+    memory = []
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(batches):
+        for _ in range(per_batch):
+            last = render(form_class)
+        gc.collect()
+        memory.append(tracemalloc.get_traced_memory()[0])
+    elapsed = time.perf_counter() - started
+    tracemalloc.stop()
+
+    # Первая половина партий - прогрев
+    middle = len(memory) // 2
+    growth = (memory[-1] - memory[middle]) / max(per_batch * (len(memory) - 1 - middle), 1)
+
+    return first, last, growth, elapsed / (per_batch * batches)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--batches', type=int, default=10)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False)
+
+    print(f'{"форма":<20} {"HTML, байт":>12} {"после":>8} {"рост памяти, байт/форма":>24} {"мкс/форма":>10}')
+    html_changed, memory_grew = [], []
+    with app.test_request_context():
+        for form_class in FORMS:
+            first, last, growth, elapsed = measure(form_class, args.iterations, args.batches)
+            if first != last:
+                html_changed.append(form_class.__name__)
+            if growth > MEMORY_GROWTH_LIMIT:
+                memory_grew.append(form_class.__name__)
+            print(f'{form_class.__name__:<20} {first:>12} {last:>8} {growth:>24.2f} {elapsed * 1e6:>10.1f}')
+
+    if html_changed:
+        raise SystemExit(f'размер HTML формы меняется от экземпляра к экземпляру: {", ".join(html_changed)}')
+    if memory_grew:
+        raise SystemExit(f'память растет больше {MEMORY_GROWTH_LIMIT} байт на форму: {", ".join(memory_grew)}')
+
+
+if __name__ == '__main__':
+    main()
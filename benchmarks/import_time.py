@@ -0,0 +1,85 @@
+"""Время импорта пакета app и создания приложения в новом процессе.
+
+"import app" не должен тянуть view, формы и WeasyPrint: они загружаются только в create_app().
+Результат можно сохранить в JSON и сравнить с эталоном, как и прогон маршрутов.
+
+Запуск: python -m benchmarks.import_time [--runs 10] [--output import.json] [--baseline import.json] [--tolerance 0.2]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+MEASURE = '''
+import time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(imported - started, created - imported)
+'''
+
+
+def slowest_imports(limit):
+    """Модули с наибольшим собственным временем импорта по данным python -X importtime."""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'], capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative), int(own), name.strip()))
+
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--output')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    samples = [
+        [float(value) for value in subprocess.run(
+            [sys.executable, '-c', MEASURE], capture_output=True, text=True, check=True).stdout.split()[-2:]]
+        for _ in range(args.runs)
+    ]
+    result = {
+        'import_ms': round(statistics.median(sample[0] for sample in samples) * 1000, 1),
+        'create_app_ms': round(statistics.median(sample[1] for sample in samples) * 1000, 1),
+    }
+
+    print(f"import app: {result['import_ms']} мс, create_app(): {result['create_app_ms']} мс")
+    print('Самые долгие импорты (всего / собственное время, мс):')
+    for cumulative, own, name in slowest_imports(10):
+        print(f'  {cumulative / 1000:8.1f} {own / 1000:8.1f}  {name}')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+
+        regressions = [
+            f'{key}: {baseline[key]} -> {value} мс'
+            for key, value in result.items()
+            if key in baseline and value > baseline[key] * (1 + args.tolerance)
+        ]
+        for line in regressions:
+            print('Регрессия:', line)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Задержка и пиковая память построения списка резюме в зависимости от их числа.
+
+Сравнивает прежнюю загрузку всех ORM-объектов с постраничной выборкой только нужных колонок.
+Запуск: python -m benchmarks.index_page [--sizes 100,1000,10000,100000]
+"""
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DEVELOPMENT_DATABASE_URI', 'sqlite://')
+
+from flask import current_app
+
+from app import create_app, db, migrations
+from app.models import User, Resume
+from app.queries import resume_index_page
+
+
+def full_load(user_id):
+    return db.session.query(Resume).filter_by(user_id=user_id).all()
+
+
+def keyset_page(user_id):
+    return resume_index_page(user_id, per_page=current_app.config['INDEX_PAGE_SIZE'])
+
+
+def measure(func, user_id, repeat=5):
+    timings, peaks = [], []
+
+    for _ in range(repeat):
+        db.session.expunge_all()
+        tracemalloc.start()
+        started = time.perf_counter()
+        func(user_id)
+        timings.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return statistics.median(timings) * 1000, max(peaks) / 1024
+
+
+def seed(user_id, total, start):
+    now = datetime.now()
+    db.session.execute(Resume.__table__.insert(), [
+        {'name': f'Резюме {number}', 'user_id': user_id, 'updated_on': now - timedelta(seconds=number)}
+        for number in range(start, total)
+    ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='100,1000,10000,100000')
+    args = parser.parse_args()
+
+    with create_app().app_context():
+        migrations.upgrade()
+        user = User(username='bench', password='bench')
+        db.session.add(user)
+        db.session.commit()
+
+        print(f'{"резюме":>8} {"все, мс":>10} {"все, КБ":>10} {"стр., мс":>10} {"стр., КБ":>10}')
+        seeded = 0
+        for size in sorted(int(value) for value in args.sizes.split(',')):
+            seed(user.id, size, seeded)
+            seeded = size
+            full_ms, full_kib = measure(full_load, user.id)
+            page_ms, page_kib = measure(keyset_page, user.id)
+            print(f'{size:>8} {full_ms:>10.2f} {full_kib:>10.0f} {page_ms:>10.2f} {page_kib:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
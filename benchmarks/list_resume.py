@@ -0,0 +1,82 @@
+"""Число SQL-запросов страницы list_resume в зависимости от размера резюме.
+
+load_resume_graph должен загружать резюме со всеми разделами за GRAPH_STATEMENTS запросов,
+а число запросов всей страницы - не зависеть от числа мест работы и учебы.
+Прогон завершается ошибкой, если это не так.
+Запуск: python -m benchmarks.list_resume [--jobs 1,10,100] [--requests 50]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('DEVELOPMENT_DATABASE_URI', 'sqlite://')
+
+from app import create_app, migrations
+from app.queries import load_resume_graph
+from benchmarks.routes import StatementCounter, ClientSession, login
+from benchmarks.seed import seed_database
+
+
+# Резюме с личными данными, специализацией, контактами и опытом одним JOIN, места учебы - вторым запросом
+GRAPH_STATEMENTS = 2
+
+
+def count_graph(app, counter, resume_id):
+    with app.app_context():
+        counter.count = 0
+        resume = load_resume_graph(resume_id)
+        # Обращение к разделам после загрузки не должно выполнять запросов
+        sections = [resume.personal, resume.specialization, resume.contact,
+                    resume.experience.jobs, resume.education.schools]
+        if not all(section is not None for section in sections):
+            raise SystemExit('в резюме не хватает разделов')
+
+        return counter.count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', default='1,10,100')
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    page_statements = set()
+    print(f'{"мест работы":>12} {"запросов графа":>15} {"запросов страницы":>18} {"мс":>8}')
+    for jobs in (int(value) for value in args.jobs.split(',')):
+        # Для каждого размера - новое приложение и своя база в памяти
+        app = create_app()
+        with app.app_context():
+            migrations.upgrade()
+            fixtures = seed_database(users=1, resumes_per_user=1, jobs_per_experience=jobs, schools_per_education=jobs)
+
+        resume_id = fixtures['bench0'][0]['resume_id']
+        counter = StatementCounter()
+        counter.install(app)
+        graph = count_graph(app, counter, resume_id)
+
+        session = ClientSession(app)
+        login(session, 'bench0')
+        path = f'/list_resume/{resume_id}/'
+        session.client.get(path)
+
+        counter.count = 0
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            response = session.client.get(path)
+        elapsed = time.perf_counter() - started
+
+        if response.status_code != 200:
+            raise SystemExit(f'ответ {response.status_code}')
+        statements = counter.count / args.requests
+        page_statements.add(statements)
+        print(f'{jobs:>12} {graph:>15} {statements:>18.1f} {elapsed / args.requests * 1000:>8.2f}')
+
+        if graph > GRAPH_STATEMENTS:
+            raise SystemExit(f'load_resume_graph выполнил {graph} запросов вместо {GRAPH_STATEMENTS}')
+
+    if len(page_statements) > 1:
+        raise SystemExit('число запросов страницы растет вместе с резюме')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Сводка результатов прогона и сравнение с сохраненным эталоном."""
+import json
+import math
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    index = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def summarize(results):
+    """Переводит сырые замеры в задержки (мс), пропускную способность и число SQL-запросов на запрос."""
+    summary = {}
+
+    for name, result in results.items():
+        timings = result['timings']
+        count = len(timings)
+        summary[name] = {
+            'requests': count,
+            'errors': len(result['errors']),
+            'p50_ms': round(percentile(timings, 0.50) * 1000, 3) if count else None,
+            'p95_ms': round(percentile(timings, 0.95) * 1000, 3) if count else None,
+            'p99_ms': round(percentile(timings, 0.99) * 1000, 3) if count else None,
+            'rps': round(count / result['seconds'], 1) if result['seconds'] else None,
+            'statements': round(result['statements'] / count, 2) if count else None,
+        }
+
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'маршрут':28} {'запросов':>8} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'rps':>8} {'SQL':>6}")
+    for name, row in summary.items():
+        print(
+            f"{name:28} {row['requests']:>8} {row['p50_ms'] or 0:>9.2f} {row['p95_ms'] or 0:>9.2f} "
+            f"{row['p99_ms'] or 0:>9.2f} {row['rps'] or 0:>8.1f} {row['statements'] or 0:>6.1f}"
+            + (f"  ошибок: {row['errors']}" if row['errors'] else '')
+        )
+
+
+def write_report(path, meta, summary):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'meta': meta, 'routes': summary}, file, ensure_ascii=False, indent=2)
+
+
+def compare(summary, baseline_path, tolerance):
+    """Возвращает список регрессий относительно эталона.
+
+    Регрессия - рост p95 больше чем на tolerance (доля) или появление лишнего SQL-запроса на запрос
+    (дробные колебания из-за промахов кэша пользователей не считаются).
+    """
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = json.load(file)['routes']
+
+    regressions = []
+    for name, row in summary.items():
+        base = baseline.get(name)
+        if not base or not row['requests'] or not base['requests']:
+            continue
+
+        if row['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']} -> {row['p95_ms']} мс")
+        if row['statements'] > base['statements'] + 0.5:
+            regressions.append(f"{name}: SQL-запросов {base['statements']} -> {row['statements']}")
+
+    return regressions
@@ -0,0 +1,234 @@
+"""Сценарии запросов ко всем маршрутам приложения и два способа их выполнения:
+через тестовый клиент Flask и по HTTP из нескольких потоков."""
+import http.cookiejar
+import io
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from sqlalchemy import event
+from werkzeug.serving import make_server
+
+from app import db
+
+
+CSRF_PATTERN = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+
+JOB = {
+    'name': 'Компания', 'specialization': 'development', 'grade': 'senior', 'position': 'Ведущий разработчик',
+    'start': '2015-01-01', 'finish': '2018-01-01', 'about': 'Проектирование', 'skills': 'python',
+}
+SCHOOL = {'name': 'Университет', 'course': 'Математика', 'start': '2005-09-01', 'finish': '2010-06-30'}
+PERSONAL = {'surname': 'Иванов', 'name': 'Иван', 'gender': 'male', 'birthdate': '1990-01-01', 'location': 'Москва'}
+SPECIALIZATION = {
+    'readiness': 'looking', 'salary': '200000', 'specialization': 'development', 'grade': 'senior', 'skills': 'python',
+}
+
+
+def _contact(resume):
+    return {'email': f"r{resume['resume_id']}@bench.example.com", 'phone': f"+7{resume['resume_id']:010d}"}
+
+
+def _spare(ids):
+    """Забирает запись для удаления, оставляя первую для сценариев редактирования."""
+    return ids.pop() if len(ids) > 1 else None
+
+
+# (имя, метод, путь, данные формы); путь и данные строятся по случайному резюме пользователя
+SCENARIOS = [
+    ('index', 'GET', lambda r: '/', None),
+    ('list_resume', 'GET', lambda r: f"/list_resume/{r['resume_id']}/", None),
+    ('edit_personal', 'GET', lambda r: f"/resumes/{r['resume_id']}/edit_personal/", None),
+    ('edit_personal:post', 'POST', lambda r: f"/resumes/{r['resume_id']}/edit_personal/", lambda r: PERSONAL),
+    ('edit_specialization', 'GET', lambda r: f"/resumes/{r['resume_id']}/edit_specialization/", None),
+    ('edit_specialization:post', 'POST', lambda r: f"/resumes/{r['resume_id']}/edit_specialization/",
+     lambda r: SPECIALIZATION),
+    ('edit_experience', 'GET', lambda r: f"/resumes/{r['resume_id']}/edit_experience/", None),
+    ('edit_job', 'GET',
+     lambda r: f"/resumes/{r['resume_id']}/edit_experience/{r['experience_id']}/edit_job/{r['job_ids'][0]}/", None),
+    ('edit_job:post', 'POST',
+     lambda r: f"/resumes/{r['resume_id']}/edit_experience/{r['experience_id']}/edit_job/{r['job_ids'][0]}/",
+     lambda r: JOB),
+    ('edit_education', 'GET', lambda r: f"/resumes/{r['resume_id']}/edit_education/", None),
+    ('edit_school', 'GET',
+     lambda r: f"/resumes/{r['resume_id']}/edit_education/{r['education_id']}/edit_school/{r['school_ids'][0]}/",
+     None),
+    ('edit_school:post', 'POST',
+     lambda r: f"/resumes/{r['resume_id']}/edit_education/{r['education_id']}/edit_school/{r['school_ids'][0]}/",
+     lambda r: SCHOOL),
+    ('edit_contact', 'GET', lambda r: f"/resumes/{r['resume_id']}/edit_contact/", None),
+    ('edit_contact:post', 'POST', lambda r: f"/resumes/{r['resume_id']}/edit_contact/", _contact),
+    # Удаления идут последними, чтобы не мешать сценариям редактирования
+    ('delete_job', 'GET',
+     lambda r: f"/resumes/{r['resume_id']}/edit_experience/{r['experience_id']}/delete_job/{_spare(r['job_ids'])}/",
+     None),
+    ('delete_school', 'GET',
+     lambda r: f"/resumes/{r['resume_id']}/edit_experience/{r['education_id']}/delete_school/{_spare(r['school_ids'])}/",
+     None),
+]
+
+
+class StatementCounter:
+    """Считает SQL-запросы ко всем соединениям движка, в том числе из потоков сервера."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self._lock:
+            self.count += 1
+
+    def install(self, app):
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self)
+
+
+class ClientSession:
+    """Сессия пользователя поверх тестового клиента Flask."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        if method == 'GET':
+            response = self.client.get(path)
+        else:
+            # PersonalForm читает request.files['image'], поэтому всегда отправляется multipart с пустым файлом
+            data = dict(data, image=(io.BytesIO(b''), ''))
+            response = self.client.post(path, data=data, content_type='multipart/form-data')
+        return response.status_code, response.get_data(as_text=True)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """Сессия пользователя по HTTP с собственными cookie."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, method, path, data=None):
+        body, headers = None, {}
+
+        if method == 'POST':
+            boundary = uuid.uuid4().hex
+            parts = [
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+                for name, value in data.items()
+            ]
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename=""\r\n'
+                f'Content-Type: application/octet-stream\r\n\r\n\r\n--{boundary}--\r\n')
+            body = ''.join(parts).encode('utf-8')
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(request) as response:
+                return response.status, response.read().decode('utf-8')
+        except urllib.error.HTTPError as error:
+            return error.code, error.read().decode('utf-8', 'replace')
+
+
+def login(session, username):
+    """Входит под пользователем и возвращает CSRF-токен сессии для последующих POST-запросов."""
+    _, body = session.request('GET', '/login/')
+    token = CSRF_PATTERN.search(body).group(1)
+    started = time.perf_counter()
+    status, _ = session.request('POST', '/login/', {'username': username, 'password': 'bench', 'csrf_token': token})
+    elapsed = time.perf_counter() - started
+
+    if status != 302:
+        raise RuntimeError(f'Не удалось войти под {username}: {status}')
+
+    return token, elapsed
+
+
+def _run_scenario(session, token, resumes, scenario, requests, rng, timings, errors):
+    name, method, path, data = scenario
+
+    for _ in range(requests):
+        resume = rng.choice(resumes)
+        url = path(resume)
+        if url.endswith('/None/'):
+            continue
+
+        form = dict(data(resume), csrf_token=token) if data else None
+        started = time.perf_counter()
+        status, _ = session.request(method, url, form)
+        timings.append(time.perf_counter() - started)
+
+        if status >= 400:
+            errors.append((name, url, status))
+
+
+def run(app, fixtures, requests, threads=1, http=False, seed=0):
+    """Прогоняет все сценарии и возвращает {маршрут: {'timings', 'seconds', 'statements', 'errors'}}."""
+    counter = StatementCounter()
+    counter.install(app)
+    server = None
+
+    if http:
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        make_session = lambda: HttpSession(f'http://127.0.0.1:{server.server_port}')
+    else:
+        make_session = lambda: ClientSession(app)
+
+    usernames = sorted(fixtures)[:threads]
+    users = []
+    login_timings = []
+    login_started = time.perf_counter()
+    login_statements = counter.count
+
+    for username in usernames:
+        session = make_session()
+        token, elapsed = login(session, username)
+        login_timings.append(elapsed)
+        users.append((session, token, fixtures[username], random.Random(f'{seed}-{username}')))
+
+    results = {'login': {
+        'timings': login_timings,
+        'seconds': time.perf_counter() - login_started,
+        'statements': counter.count - login_statements,
+        'errors': [],
+    }}
+
+    try:
+        for scenario in SCENARIOS:
+            timings, errors = [], []
+            statements = counter.count
+            per_user = max(requests // len(users), 1)
+            workers = [
+                threading.Thread(
+                    target=_run_scenario, args=(session, token, resumes, scenario, per_user, rng, timings, errors))
+                for session, token, resumes, rng in users
+            ]
+
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+            results[scenario[0]] = {
+                'timings': timings,
+                'seconds': time.perf_counter() - started,
+                'statements': counter.count - statements,
+                'errors': errors,
+            }
+    finally:
+        if server:
+            server.shutdown()
+
+    return results
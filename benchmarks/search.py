@@ -0,0 +1,67 @@
+"""Время поиска через /api/search/ и проверка, что пользователь находит только свои резюме.
+
+Резюме поровну принадлежат двум пользователям; у резюме первого в навыках есть слово,
+которого нет у второго. Прогон завершается ошибкой, если поиск вернул чужое резюме.
+Запуск: python -m benchmarks.search [--resumes 200] [--requests 200]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('DEVELOPMENT_DATABASE_URI', 'sqlite://')
+
+from app import create_app, db, migrations
+from app.models import Specialization
+from benchmarks.routes import ClientSession, login
+from benchmarks.seed import seed_database
+
+
+SECRET_SKILL = 'secretskill'
+
+
+def search(client, query, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/api/search/', query_string={'q': query, 'per_page': 100})
+    elapsed = time.perf_counter() - started
+
+    if response.status_code != 200:
+        raise SystemExit(f'ответ {response.status_code}')
+
+    return {result['id'] for result in response.get_json()['results']}, elapsed / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--resumes', type=int, default=200, help='резюме на пользователя')
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        migrations.upgrade()
+        fixtures = seed_database(users=2, resumes_per_user=args.resumes, jobs_per_experience=3, schools_per_education=2)
+        owned = {username: {resume['resume_id'] for resume in resumes} for username, resumes in fixtures.items()}
+
+        for specialization in Specialization.query.filter(Specialization.resume_id.in_(owned['bench0'])):
+            specialization.skills = f'{specialization.skills} {SECRET_SKILL}'
+        db.session.commit()
+
+    print(f'{"пользователь":<13} {"запрос":<13} {"найдено":>8} {"ожидалось":>10} {"мс":>8}')
+    for username in ('bench0', 'bench1'):
+        session = ClientSession(app)
+        login(session, username)
+
+        for query in ('python', SECRET_SKILL):
+            found, ms = search(session.client, query, args.requests)
+            expected = owned[username] if query == 'python' or username == 'bench0' else set()
+
+            if found - owned[username]:
+                raise SystemExit(f'{username} нашел чужие резюме: {sorted(found - owned[username])[:10]}')
+            if len(found) != min(len(expected), 100):
+                raise SystemExit(f'{username} по запросу {query!r} нашел {len(found)} резюме из {len(expected)}')
+            print(f'{username:<13} {query:<13} {len(found):>8} {min(len(expected), 100):>10} {ms:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
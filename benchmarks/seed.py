@@ -0,0 +1,87 @@
+"""Заполнение базы синтетическими данными заданного размера."""
+import json
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from app import db, transfer
+from app.models import User, Resume, Experience, Job, Education, School
+
+
+def make_document(rng, number, jobs, schools):
+    start = date(2010, 1, 1) + timedelta(days=rng.randrange(3000))
+
+    return {
+        'name': f'Резюме {number}',
+        'personal': {
+            'surname': f'Фамилия{number}', 'name': 'Имя', 'gender': rng.choice(['male', 'female']),
+            'birthdate': '1990-01-01', 'location': rng.choice(['Москва', 'Казань', 'Пермь']),
+        },
+        'specialization': {
+            'readiness': 'looking', 'salary': rng.randrange(50, 500) * 1000, 'specialization': 'development',
+            'grade': rng.choice(['junior', 'middle', 'senior']), 'skills': 'python flask sqlalchemy',
+            'slogan': 'Разработчик', 'languages': 'английский',
+        },
+        'jobs': [
+            {
+                'name': f'Компания {index}', 'specialization': 'development', 'grade': 'middle',
+                'position': 'Разработчик', 'start': start.isoformat(), 'finish': (start + timedelta(days=365)).isoformat(),
+                'about': 'Разработка и поддержка веб-сервисов', 'skills': 'python sql',
+            }
+            for index in range(jobs)
+        ],
+        'schools': [
+            {'name': f'Университет {index}', 'course': 'Информатика', 'start': '2005-09-01', 'finish': '2009-06-30'}
+            for index in range(schools)
+        ],
+        'contact': {'email': f'user{number}@example.com', 'phone': f'+7900{number:07d}'},
+    }
+
+
+def seed_database(users, resumes_per_user, jobs_per_experience, schools_per_education, seed=0):
+    """Создает пользователей bench0..benchN с паролем bench и их резюме. Возвращает описание данных для сценариев."""
+    rng = random.Random(seed)
+    db.session.execute(User.__table__.insert(), [
+        {'username': f'bench{index}', 'password': 'bench'} for index in range(users)])
+    db.session.commit()
+
+    def lines():
+        for number in range(users * resumes_per_user):
+            document = make_document(rng, number, jobs_per_experience, schools_per_education)
+            document['user'] = f'bench{number % users}'
+            yield json.dumps(document)
+
+    transfer.import_resumes(lines(), batch_size=1000)
+
+    return load_fixtures()
+
+
+def load_fixtures():
+    """Для каждого пользователя - его резюме с id опыта, образования, мест работы и учебы."""
+    fixtures = {}
+    rows = db.session.execute(
+        select(User.username, Resume.id, Experience.id, Education.id)
+        .join(Resume, Resume.user_id == User.id)
+        .join(Experience, Experience.resume_id == Resume.id)
+        .join(Education, Education.resume_id == Resume.id)
+    )
+
+    for username, resume_id, experience_id, education_id in rows:
+        fixtures.setdefault(username, []).append({
+            'resume_id': resume_id,
+            'experience_id': experience_id,
+            'education_id': education_id,
+            'job_ids': [],
+            'school_ids': [],
+        })
+
+    by_experience = {r['experience_id']: r for resumes in fixtures.values() for r in resumes}
+    by_education = {r['education_id']: r for resumes in fixtures.values() for r in resumes}
+
+    for job_id, experience_id in db.session.execute(select(Job.id, Job.experience_id)):
+        by_experience[experience_id]['job_ids'].append(job_id)
+    for school_id, education_id in db.session.execute(select(School.id, School.education_id)):
+        by_education[education_id]['school_ids'].append(school_id)
+
+    return fixtures
@@ -0,0 +1,142 @@
+"""Пропускная способность runner.py serve в зависимости от числа воркеров.
+
+Сервер запускается отдельным процессом на общей базе, нагрузку дают несколько
+процессов-клиентов, каждый под своим пользователем открывает страницы своих резюме.
+Рост числа запросов в секунду ограничен числом ядер: клиенты работают на той же машине.
+
+Запуск: python -m benchmarks.serve [--workers 1,2,4] [--clients 8] [--requests 200]
+"""
+import argparse
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+
+# Дочерние процессы запускаются из корня репозитория, откуда бы ни был запущен сам замер
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNNER = os.path.join(ROOT, 'runner.py')
+
+
+def seed(clients):
+    from app import create_app, migrations
+    from benchmarks.seed import seed_database
+
+    with create_app().app_context():
+        migrations.upgrade()
+        seed_database(users=clients, resumes_per_user=5, jobs_per_experience=3, schools_per_education=2)
+
+
+def client(base_url, username, requests):
+    from app import create_app
+    from benchmarks.routes import HttpSession, login
+    from benchmarks.seed import load_fixtures
+
+    with create_app().app_context():
+        resumes = load_fixtures()[username]
+
+    session = HttpSession(base_url)
+    login(session, username)
+    rng = random.Random(username)
+
+    started = time.time()
+    for _ in range(requests):
+        status, _ = session.request('GET', f"/list_resume/{rng.choice(resumes)['resume_id']}/")
+        if status != 200:
+            raise SystemExit(f'ответ {status}')
+
+    print(started, time.time())
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + '/ready') as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+
+    raise SystemExit('сервер не стал готов')
+
+
+def run(env, workers, clients, requests):
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    server = subprocess.Popen(
+        [sys.executable, RUNNER, 'serve', '--port', str(port), '--workers', str(workers), '--max-requests', '0'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        wait_ready(base_url)
+        processes = [
+            subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.serve', '--client', base_url, '--username', f'bench{number}',
+                 '--requests', str(requests)],
+                cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            )
+            for number in range(clients)
+        ]
+        results = [process.communicate()[0].split()[-2:] for process in processes]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+    elapsed = max(float(result[1]) for result in results) - min(float(result[0]) for result in results)
+    return clients * requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='запросов на клиента')
+    parser.add_argument('--seed', action='store_true')
+    parser.add_argument('--client')
+    parser.add_argument('--username')
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.clients)
+        return
+
+    if args.client:
+        client(args.client, args.username, args.requests)
+        return
+
+    print(f'ядер: {os.cpu_count()}')
+    print(f'{"воркеров":>9} {"запросов/с":>12} {"ускорение":>10}')
+    with tempfile.TemporaryDirectory() as folder:
+        env = dict(
+            os.environ,
+            SQLITE_PROFILE='production',
+            TEMPLATE_CACHE_FOLDER=folder,
+            DEVELOPMENT_DATABASE_URI='sqlite:///' + os.path.join(folder, 'bench.db'),
+        )
+        subprocess.run([sys.executable, '-m', 'benchmarks.serve', '--seed', '--clients', str(args.clients)],
+                       cwd=ROOT, env=env, check=True, capture_output=True)
+
+        baseline = None
+        for workers in map(int, args.workers.split(',')):
+            throughput = run(env, workers, args.clients, args.requests)
+            baseline = baseline or throughput
+            print(f'{workers:>9} {throughput:>12.1f} {throughput / baseline:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Стоимость чтения резюме через API из снимка и из таблиц в зависимости от числа мест работы.
+
+Из снимка документ отдается одной выборкой по первичному ключу; без снимка он собирается из всех разделов.
+Запуск: python -m benchmarks.snapshots [--jobs 1,10,100] [--requests 200]
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault('DEVELOPMENT_DATABASE_URI', 'sqlite://')
+
+from sqlalchemy import text
+
+from app import create_app, db, migrations
+from benchmarks.routes import StatementCounter, ClientSession, login
+from benchmarks.seed import seed_database
+
+
+def measure(client, counter, path, requests):
+    counter.count = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path)
+    elapsed = time.perf_counter() - started
+
+    if response.status_code != 200:
+        raise SystemExit(f'ответ {response.status_code}')
+
+    return response.get_json(), counter.count / requests, elapsed / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', default='1,10,100')
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f'{"мест работы":>12} {"запросов снимок":>16} {"мс снимок":>10} {"запросов таблицы":>17} {"мс таблицы":>11}')
+    for jobs in (int(value) for value in args.jobs.split(',')):
+        # Для каждого размера - новое приложение и своя база в памяти
+        app = create_app()
+        with app.app_context():
+            migrations.upgrade()
+            fixtures = seed_database(users=1, resumes_per_user=1, jobs_per_experience=jobs, schools_per_education=3)
+
+        counter = StatementCounter()
+        counter.install(app)
+        session = ClientSession(app)
+        login(session, 'bench0')
+        path = f"/api/resumes/{fixtures['bench0'][0]['resume_id']}/"
+
+        snapshot, snapshot_statements, snapshot_ms = measure(session.client, counter, path, args.requests)
+        with app.app_context():
+            db.session.execute(text('DELETE FROM resume_snapshots'))
+            db.session.commit()
+        document, statements, ms = measure(session.client, counter, path, args.requests)
+
+        if snapshot != document:
+            raise SystemExit('снимок не совпадает с документом из таблиц')
+        print(f'{jobs:>12} {snapshot_statements:>16.1f} {snapshot_ms:>10.2f} {statements:>17.1f} {ms:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
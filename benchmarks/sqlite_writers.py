@@ -0,0 +1,112 @@
+"""Пропускная способность записи в SQLite при нескольких процессах-писателях.
+
+Каждый процесс, как view редактирования, читает строку специализации, меняет ее
+и делает commit. Сравниваются профили движка из app.database.SQLITE_PROFILES:
+'default' без повторов и 'production' (WAL, PRAGMA, пул, повтор при "database is locked").
+
+Запуск: python -m benchmarks.sqlite_writers [--writers 1,2,4,8] [--writes 200]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+
+PROFILES = (('default', 0), ('production', None))
+
+
+def write(count, retries):
+    from app import create_app, db
+    from app.database import retry_on_busy
+    from app.models import Specialization
+
+    @retry_on_busy
+    def update(resume_id):
+        specialization = db.session.query(Specialization).filter_by(resume_id=resume_id).first()
+        specialization.salary = random.randrange(1, 1000) * 1000
+        db.session.commit()
+
+    app = create_app()
+    if retries is not None:
+        app.config['SQLITE_BUSY_RETRIES'] = retries
+
+    done = failed = 0
+    with app.app_context():
+        resume_ids = [row[0] for row in db.session.query(Specialization.resume_id)]
+        # Время замеряется внутри процесса, чтобы не учитывать запуск интерпретатора и импорт приложения
+        started = time.time()
+        for _ in range(count):
+            try:
+                update(random.choice(resume_ids))
+                done += 1
+            except Exception:
+                db.session.rollback()
+                failed += 1
+
+    print(done, failed, started, time.time())
+
+
+def seed():
+    from app import create_app, migrations
+    from benchmarks.seed import seed_database
+
+    with create_app().app_context():
+        migrations.upgrade()
+        seed_database(users=1, resumes_per_user=50, jobs_per_experience=1, schools_per_education=1)
+
+
+def run(profile, retries, writers, writes):
+    with tempfile.TemporaryDirectory() as folder:
+        env = dict(
+            os.environ,
+            SQLITE_PROFILE=profile,
+            DEVELOPMENT_DATABASE_URI='sqlite:///' + os.path.join(folder, 'bench.db'),
+        )
+        subprocess.run([sys.executable, '-m', 'benchmarks.sqlite_writers', '--seed'], env=env, check=True,
+                       capture_output=True)
+
+        command = [sys.executable, '-m', 'benchmarks.sqlite_writers', '--worker', '--writes', str(writes)]
+        if retries is not None:
+            command += ['--retries', str(retries)]
+
+        processes = [
+            subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            for _ in range(writers)
+        ]
+        results = [process.communicate()[0].split()[-4:] for process in processes]
+
+    done = sum(int(result[0]) for result in results)
+    failed = sum(int(result[1]) for result in results)
+    elapsed = max(float(result[3]) for result in results) - min(float(result[2]) for result in results)
+    return done / elapsed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', default='1,2,4,8')
+    parser.add_argument('--writes', type=int, default=200, help='коммитов на процесс')
+    parser.add_argument('--worker', action='store_true')
+    parser.add_argument('--seed', action='store_true')
+    parser.add_argument('--retries', type=int)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed()
+        return
+
+    if args.worker:
+        write(args.writes, args.retries)
+        return
+
+    print(f'{"профиль":<12} {"писателей":>10} {"коммитов/с":>12} {"ошибок":>8}')
+    for writers in map(int, args.writers.split(',')):
+        for profile, retries in PROFILES:
+            throughput, failed = run(profile, retries, writers, args.writes)
+            print(f'{profile:<12} {writers:>10} {throughput:>12.1f} {failed:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Сравнение наивного сохранения загрузок с контентно-адресуемым хранилищем.
+
+Записанные байты считаются по счетчику wchar из /proc/self/io - все, что процесс передал
+в write() во время сохранения, а не итоговый размер папки. База - в памяти, поэтому
+запись на диск делают только сами файлы. Создание приложения и схемы в замер не входит.
+Запуск: python -m benchmarks.upload_dedup [--files 2000] [--distinct 50] [--size 200000]
+"""
+import argparse
+import io
+import os
+import random
+import shutil
+import tempfile
+import time
+
+os.environ.setdefault('DEVELOPMENT_DATABASE_URI', 'sqlite://')
+
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+
+from app import create_app, db, migrations
+from app.storage import save_upload
+
+
+def written_bytes():
+    with open('/proc/self/io') as stats:
+        for line in stats:
+            name, value = line.split(':')
+            if name == 'wchar':
+                return int(value)
+
+    raise SystemExit('в /proc/self/io нет счетчика wchar')
+
+
+def folder_usage(folder):
+    total = files = 0
+    for root, _, names in os.walk(folder):
+        for name in names:
+            total += os.path.getsize(os.path.join(root, name))
+            files += 1
+    return total, files
+
+
+def make_corpus(files, distinct, size):
+    rng = random.Random(0)
+    blobs = [rng.randbytes(size) for _ in range(distinct)]
+    return [(f'photo_{i}.png', blobs[rng.randrange(distinct)]) for i in range(files)]
+
+
+def run_naive(corpus, folder):
+    before = written_bytes()
+    started = time.perf_counter()
+    for filename, data in corpus:
+        FileStorage(io.BytesIO(data), filename).save(os.path.join(folder, secure_filename(filename)))
+    return written_bytes() - before, time.perf_counter() - started
+
+
+def run_store(corpus, folder):
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = folder
+
+    with app.app_context():
+        migrations.upgrade()
+
+        before = written_bytes()
+        started = time.perf_counter()
+        for filename, data in corpus:
+            save_upload(FileStorage(io.BytesIO(data), filename))
+            db.session.commit()
+        elapsed = time.perf_counter() - started
+
+        return written_bytes() - before, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--distinct', type=int, default=50)
+    parser.add_argument('--size', type=int, default=200_000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.files, args.distinct, args.size)
+    naive_dir, store_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+
+    try:
+        naive_written, naive_time = run_naive(corpus, naive_dir)
+        store_written, store_time = run_store(corpus, store_dir)
+        naive_usage, naive_files = folder_usage(naive_dir)
+        store_usage, store_files = folder_usage(store_dir)
+    finally:
+        shutil.rmtree(naive_dir)
+        shutil.rmtree(store_dir)
+
+    print(f'загрузок: {args.files}, различных: {args.distinct}, размер: {args.size} байт')
+    print(f'{"способ":<10} {"файлов":>8} {"на диске, байт":>16} {"записано, байт":>16} {"с":>8}')
+    print(f'{"наивный":<10} {naive_files:>8} {naive_usage:>16} {naive_written:>16} {naive_time:>8.2f}')
+    print(f'{"хранилище":<10} {store_files:>8} {store_usage:>16} {store_written:>16} {store_time:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Число SQL-запросов и время ответа на аутентифицированный запрос с кэшем пользователя и без него.
+
+Запуск: python -m benchmarks.user_loader [--requests 500]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+BACKENDS = ('none', 'memory', 'sqlite')
+
+
+def measure(requests):
+    from app import create_app, migrations
+    from benchmarks.routes import StatementCounter, ClientSession, login
+    from benchmarks.seed import seed_database
+
+    app = create_app()
+
+    with app.app_context():
+        migrations.upgrade()
+        fixtures = seed_database(users=1, resumes_per_user=1, jobs_per_experience=1, schools_per_education=1)
+
+    counter = StatementCounter()
+    counter.install(app)
+    session = ClientSession(app)
+    login(session, 'bench0')
+    path = f"/edit_resume/{fixtures['bench0'][0]['resume_id']}/"
+
+    counter.count = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        # Перенаправление без рендеринга: почти вся работа - загрузка пользователя
+        status, _ = session.request('GET', path)
+    elapsed = time.perf_counter() - started
+
+    if status != 302:
+        raise SystemExit(f'ответ {status}')
+    print(f'{counter.count / requests:.2f} {elapsed / requests * 1000:.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--backend', choices=BACKENDS)
+    args = parser.parse_args()
+
+    if args.backend:
+        measure(args.requests)
+        return
+
+    print(f'{"кэш":<8} {"запросов на ответ":>18} {"мс на ответ":>12}')
+    for backend in BACKENDS:
+        with tempfile.TemporaryDirectory() as folder:
+            env = dict(
+                os.environ,
+                USER_CACHE_BACKEND=backend,
+                DEVELOPMENT_DATABASE_URI='sqlite:///' + os.path.join(folder, 'bench.db'),
+            )
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.user_loader', '--backend', backend, '--requests', str(args.requests)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout.split()
+        print(f'{backend:<8} {output[-2]:>18} {output[-1]:>12}')
+
+
+if __name__ == '__main__':
+    main()
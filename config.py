@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 
 app_dir = os.path.abspath(os.path.dirname(__file__))
@@ -8,6 +9,45 @@ class BaseConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = os.path.join(app_dir, 'static', 'uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    # Предел размера одного загружаемого файла; все тело запроса - с запасом на поля формы и JSON
+    MAX_UPLOAD_SIZE = int(os.environ.get('MAX_UPLOAD_SIZE', 5 * 1024 * 1024))
+    MAX_CONTENT_LENGTH = MAX_UPLOAD_SIZE + 1024 * 1024
+    # Фоновое удаление файлов без ссылок: период в секундах (0 - отключено) и возраст, младше которого файл не трогается
+    UPLOAD_GC_INTERVAL = int(os.environ.get('UPLOAD_GC_INTERVAL', 600))
+    UPLOAD_GC_GRACE = 3600
+    FRAGMENT_CACHE_SIZE = 1024
+    INDEX_PAGE_SIZE = 50
+    IMAGE_WORKERS = 2
+    IMAGE_VARIANT_WIDTHS = (320, 640, 960)
+    # Через сколько секунд после загрузки фото недостающие уменьшенные копии больше не ждут
+    IMAGE_VARIANT_TIMEOUT = 60
+    PDF_WORKERS = 2
+    PDF_CACHE_FOLDER = os.path.join(tempfile.gettempdir(), 'resume_pdf')
+    # 'memory' - кэш в каждом процессе, 'sqlite' - общий файл для всех воркеров, 'none' - без кэша
+    USER_CACHE_BACKEND = os.environ.get('USER_CACHE_BACKEND', 'memory')
+    USER_CACHE_SIZE = 4096
+    USER_CACHE_TTL = 300
+    USER_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'resume_user_cache.sqlite')
+    # Запросы дольше порога попадают в журнал вместе со своими SQL-запросами
+    SLOW_REQUEST_SECONDS = float(os.environ.get('SLOW_REQUEST_SECONDS', 1.0))
+    SLOW_REQUEST_STATEMENTS = 50
+    # Имя endpoint, для которого включается сэмплирующий профилировщик, например 'list_resume'
+    PROFILE_ENDPOINT = os.environ.get('PROFILE_ENDPOINT')
+    PROFILE_INTERVAL = 0.005
+    PROFILE_FOLDER = os.path.join(tempfile.gettempdir(), 'resume_profile')
+    # Профиль движка SQLite из app.database.SQLITE_PROFILES
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+    SQLITE_BUSY_RETRIES = 5
+    SQLITE_BUSY_BACKOFF = 0.02
+    TEMPLATE_CACHE_FOLDER = os.environ.get('TEMPLATE_CACHE_FOLDER') or os.path.join(app_dir, 'app', 'templates_cache')
+    # Загружать все шаблоны при старте процесса, а не при первом запросе к каждой странице
+    TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', '0') == '1'
+    # runner.py serve: число воркеров, перезапуск воркера после стольких запросов (0 - никогда)
+    # со случайной добавкой до SERVE_MAX_REQUESTS_JITTER и время на завершение запросов при остановке
+    SERVE_WORKERS = int(os.environ.get('SERVE_WORKERS', os.cpu_count() or 1))
+    SERVE_MAX_REQUESTS = int(os.environ.get('SERVE_MAX_REQUESTS', 1000))
+    SERVE_MAX_REQUESTS_JITTER = 100
+    SERVE_GRACEFUL_TIMEOUT = 30
 
 
 class DevelopementConfig(BaseConfig):
@@ -17,4 +57,6 @@ class DevelopementConfig(BaseConfig):
 
 class ProductionConfig(BaseConfig):
     DEBUG = False
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+    TEMPLATE_WARMUP = os.environ.get('TEMPLATE_WARMUP', '1') == '1'
     SQLALCHEMY_DATABASE_URI = os.environ.get('PRODUCTION_DATABASE_URI') or 'sqlite:///c:/Development/resume/database.db'
@@ -1,28 +1,273 @@
-from flask_script import Manager, Shell
+import sys
 
-from app import app, db
-from app.models import (
-    User, Resume, Personal, Specialization, Experience, Job, Education, School, Contact)
+from flask import current_app
+from flask_script import Command, Manager, Option, Shell
 
+from app import create_app, db
+from app import migrations, search, snapshots, transfer
+from app.compaction import compact
+from app.assets import build_assets
+from app.cache import get_fragment_cache
+from app.server import serve
+from app.storage import orphan_files, reclaim_orphan_files, reclaim_uploads
+from app.templating import load_templates
 
-manager = Manager(app)
+
+manager = Manager(create_app)
+manager.add_option('-c', '--config', dest='config', required=False, help='Класс настроек, например config.ProductionConfig')
 
 def make_shell_context():
+    from app import models
+
     return dict(
-        app=app,
+        app=current_app._get_current_object(),
         db=db,
-        User=User,
-        Resume=Resume,
-        Personal=Personal,
-        Specialization=Specialization,
-        Experience=Experience,
-        Job=Job,
-        Education=Education,
-        School=School,
-        Contact=Contact,
+        User=models.User,
+        Resume=models.Resume,
+        Personal=models.Personal,
+        Specialization=models.Specialization,
+        Experience=models.Experience,
+        Job=models.Job,
+        Education=models.Education,
+        School=models.School,
+        Contact=models.Contact,
+        fragment_cache=get_fragment_cache(),
+    )
+
+
+
+class BuildAssets(Command):
+    """Собирает, минифицирует и сжимает статику в app/static/dist"""
+
+    def run(self):
+        for bundle, filename in build_assets().items():
+            print(f'{bundle} -> {filename}')
+
+
+class CompileTemplates(Command):
+    """Компилирует все шаблоны в кэш байткода Jinja"""
+
+    def run(self):
+        names = load_templates()
+        print(f"Скомпилировано шаблонов: {len(names)} -> {current_app.config['TEMPLATE_CACHE_FOLDER']}")
+
+
+class Upgrade(Command):
+    """Применяет миграции схемы до указанной или последней версии"""
+
+    option_list = (Option('-v', '--version', dest='version', type=int, default=None),)
+
+    def run(self, version):
+        for migration in migrations.upgrade(version):
+            print(f'+ {migration.version}: {migration.description}')
+        print(f'Текущая версия: {migrations.get_current_version()}')
+
+
+class Downgrade(Command):
+    """Откатывает миграции схемы до указанной версии"""
+
+    option_list = (Option('version', type=int),)
+
+    def run(self, version):
+        for migration in migrations.downgrade(version):
+            print(f'- {migration.version}: {migration.description}')
+        print(f'Текущая версия: {migrations.get_current_version()}')
+
+
+class Current(Command):
+    """Показывает текущую версию схемы"""
+
+    def run(self):
+        print(migrations.get_current_version())
+
+
+class CheckPlans(Command):
+    """Проверяет через EXPLAIN QUERY PLAN, что горячие запросы используют индексы"""
+
+    def run(self):
+        failures = migrations.check_query_plans()
+
+        for name, scans in failures.items():
+            print(f'{name}: {"; ".join(scans)}')
+
+        if failures:
+            sys.exit(1)
+
+        print('Все запросы используют индексы')
+
+
+class Compact(Command):
+    """Удаляет дублирующиеся и осиротевшие разделы резюме"""
+
+    def run(self):
+        with db.engine.begin() as connection:
+            stats = compact(connection)
+
+        for table, count in stats.items():
+            print(f'{table}: удалено {count}')
+        print(f'Удалено записей uploads со счетчиком 0: {reclaim_uploads()}')
+
+
+class ExportResumes(Command):
+    """Выгружает резюме в JSONL, постранично читая базу"""
+
+    option_list = (
+        Option('-u', '--user', dest='username', default=None),
+        Option('-o', '--output', dest='output', default='-'),
+        Option('-p', '--page-size', dest='page_size', type=int, default=500),
     )
 
+    def run(self, username, output, page_size):
+        if output == '-':
+            count = transfer.export_resumes(sys.stdout, username, page_size)
+        else:
+            with open(output, 'w', encoding='utf-8') as file:
+                count = transfer.export_resumes(file, username, page_size)
+
+        print(f'Выгружено резюме: {count}', file=sys.stderr)
+
+
+class ImportResumes(Command):
+    """Загружает резюме из JSONL пачками через пакетные INSERT"""
+
+    option_list = (
+        Option('-u', '--user', dest='username', default=None),
+        Option('-i', '--input', dest='source', default='-'),
+        Option('-b', '--batch-size', dest='batch_size', type=int, default=1000),
+    )
+
+    def run(self, username, source, batch_size):
+        def progress(stats):
+            print(
+                f"{stats['resumes']} резюме, {stats['rows']} строк, "
+                f"{stats['rows'] / stats['seconds']:.0f} строк/с",
+                file=sys.stderr,
+            )
+
+        if source == '-':
+            stats = transfer.import_resumes(sys.stdin, batch_size, username, progress)
+        else:
+            with open(source, encoding='utf-8') as file:
+                stats = transfer.import_resumes(file, batch_size, username, progress)
+
+        for line_number, error in stats['errors']:
+            print(f'Строка {line_number} пропущена: {error}', file=sys.stderr)
+        print(
+            f"Загружено резюме: {stats['resumes']}, строк: {stats['rows']}, пропущено: {stats['skipped']}, "
+            f"{stats['resumes'] / max(stats['seconds'], 1e-9):.0f} резюме/с",
+            file=sys.stderr,
+        )
+
+
+class RebuildSearch(Command):
+    """Перестраивает полнотекстовый индекс резюме"""
+
+    def run(self):
+        with db.engine.begin() as connection:
+            count = search.rebuild_index(connection)
+        print(f'Проиндексировано резюме: {count}')
+
+
+class RebuildSnapshots(Command):
+    """Перестраивает снимки документов резюме параллельными пачками"""
+
+    option_list = (
+        Option('-w', '--workers', dest='workers', type=int, default=None, help='процессов (по умолчанию число ядер)'),
+        Option('-b', '--batch-size', dest='batch_size', type=int, default=500),
+    )
+
+    def run(self, workers, batch_size):
+        print(f'Перестроено снимков: {snapshots.rebuild_all(workers, batch_size)}')
+
+
+class CheckSnapshots(Command):
+    """Сравнивает снимки документов с таблицами резюме"""
+
+    option_list = (
+        Option('--fix', dest='fix', action='store_true', help='перестроить расходящиеся снимки'),
+    )
+
+    def run(self, fix):
+        drift = snapshots.find_drift()
+        titles = {
+            'missing': 'нет снимка',
+            'stale': 'устаревшая версия',
+            'different': 'расходится содержимое',
+            'orphaned': 'снимок удаленного резюме',
+        }
+
+        for kind, resume_ids in drift.items():
+            if resume_ids:
+                print(f'{titles[kind]}: {", ".join(map(str, resume_ids))}')
+
+        if not any(drift.values()):
+            print('Снимки совпадают с резюме')
+        elif fix:
+            print(f'Исправлено снимков: {snapshots.repair_drift(drift)}')
+        else:
+            sys.exit(1)
+
+
+class GcUploads(Command):
+    """Удаляет загруженные файлы, на которые не ссылается ни одно резюме"""
+
+    option_list = (
+        Option('-g', '--grace', dest='grace', type=int, default=None,
+               help='не трогать файлы моложе стольких секунд (по умолчанию UPLOAD_GC_GRACE)'),
+        Option('-n', '--dry-run', dest='dry_run', action='store_true', help='только показать файлы без ссылок'),
+    )
+
+    def run(self, grace, dry_run):
+        if dry_run:
+            for path in orphan_files(grace):
+                print(path)
+            return
+
+        print(f'Удалено записей uploads со счетчиком 0: {reclaim_uploads(grace)}')
+        print(f'Удалено файлов без ссылок: {len(reclaim_orphan_files(grace))}')
+
+
+class Serve(Command):
+    """Запускает pre-fork HTTP-сервер: HUP - плавный перезапуск, TERM - остановка"""
+
+    option_list = (
+        Option('-H', '--host', dest='host', default='127.0.0.1'),
+        Option('-p', '--port', dest='port', type=int, default=8000),
+        Option('-w', '--workers', dest='workers', type=int, default=None),
+        Option('--max-requests', dest='max_requests', type=int, default=None),
+    )
+
+    def run(self, host, port, workers, max_requests):
+        config = current_app.config
+        serve(
+            current_app._get_current_object(),
+            host,
+            port,
+            workers or config['SERVE_WORKERS'],
+            config['SERVE_MAX_REQUESTS'] if max_requests is None else max_requests,
+            config['SERVE_MAX_REQUESTS_JITTER'],
+            config['SERVE_GRACEFUL_TIMEOUT'],
+        )
+
+
+db_manager = Manager(usage='Миграции схемы базы данных')
+db_manager.add_command('upgrade', Upgrade())
+db_manager.add_command('downgrade', Downgrade())
+db_manager.add_command('current', Current())
+db_manager.add_command('check', CheckPlans())
+db_manager.add_command('compact', Compact())
+
 manager.add_command('shell', Shell(make_context=make_shell_context))
+manager.add_command('build-assets', BuildAssets())
+manager.add_command('compile-templates', CompileTemplates())
+manager.add_command('db', db_manager)
+manager.add_command('export-resumes', ExportResumes())
+manager.add_command('import-resumes', ImportResumes())
+manager.add_command('rebuild-search', RebuildSearch())
+manager.add_command('rebuild-snapshots', RebuildSnapshots())
+manager.add_command('check-snapshots', CheckSnapshots())
+manager.add_command('gc-uploads', GcUploads())
+manager.add_command('serve', Serve())
 
 if __name__ == '__main__':
     manager.run()